@@ -1,5 +1,52 @@
-from django.contrib import admin
-from .models import Article, Event, EventGalleryImage, Inquiry, InquiryResponse, SoftwareSolution, CaseStudy, Service
+import hashlib
+import zipfile
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from .gallery import stage_zip, start_staged_import
+from .models import Article, Event, EventGalleryImage, Inquiry, InquiryResponse, InquiryStatus, SoftwareSolution, CaseStudy, Service
+
+User = get_user_model()
+
+
+class PrefixAutocompleteMixin:
+    """
+    Cheap search for autocomplete widgets that point at this model.
+
+    Autocomplete requests match `autocomplete_prefix_fields` with
+    istartswith (served by the UPPER(...) text_pattern_ops indexes on
+    Inquiry), cap the result at ADMIN_AUTOCOMPLETE_LIMIT rows and cache the
+    matching ids per term for ADMIN_AUTOCOMPLETE_CACHE_TIMEOUT seconds. The
+    changelist search keeps using `search_fields`.
+    """
+    autocomplete_prefix_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        match = request.resolver_match
+        if not match or match.url_name != 'autocomplete':
+            return super().get_search_results(request, queryset, search_term)
+
+        term = search_term.strip()
+        # limit_choices_to of the source field is already applied to `queryset`
+        source = f"{request.GET.get('app_label')}.{request.GET.get('model_name')}.{request.GET.get('field_name')}"
+        digest = hashlib.md5(f"{source}:{term.lower()}".encode()).hexdigest()
+        cache_key = f"admin-autocomplete:{self.opts.label_lower}:{digest}"
+        ids = cache.get(cache_key)
+        if ids is None:
+            matches = queryset
+            if term:
+                condition = Q()
+                for field in self.autocomplete_prefix_fields:
+                    condition |= Q(**{f"{field}__istartswith": term})
+                matches = matches.filter(condition)
+            ids = list(matches.values_list('pk', flat=True)[:settings.ADMIN_AUTOCOMPLETE_LIMIT])
+            cache.set(cache_key, ids, settings.ADMIN_AUTOCOMPLETE_CACHE_TIMEOUT)
+        return queryset.filter(pk__in=ids), False
 
 
 # software solution
@@ -9,6 +56,7 @@ class SoftwareSolutionAdmin(admin.ModelAdmin):
         'published_at', 'created_by',
     )
     list_filter = ('title', 'created_by')
+    list_select_related = ('created_by',)
     search_fields = ('title', 'published_at')
     exclude = ("created_by",)
     prepopulated_fields = {"slug": ("title",)}
@@ -22,6 +70,7 @@ class SoftwareSolutionAdmin(admin.ModelAdmin):
 class CaseStudyAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'summary', 'problem', 'solution', 'results', 'client_name', 'client_company', 'client_job_title', 'image', 'published_at', 'created_by')
     list_filter = ('title', 'published_at', 'created_by')
+    list_select_related = ('created_by',)
     search_fields = ('title', 'summary', 'problem', 'solution', 'results', 'client_name', 'client_company', 'client_job_title')
     exclude = ("created_by",)
     prepopulated_fields = {"slug": ("title",)}
@@ -66,6 +115,7 @@ class ServiceAdmin(admin.ModelAdmin):
 class ArticleAdmin(admin.ModelAdmin):
     list_display = ('title', 'status', 'published_at', 'author')
     list_filter = ('status', 'published_at')
+    list_select_related = ('author',)
     search_fields = ('title', 'content')
     exclude = ("author",)
 
@@ -83,20 +133,101 @@ class EventGalleryImageInline(admin.TabularInline):
     ordering = ('order', 'created_at')
 
 
+class EventAdminForm(forms.ModelForm):
+    gallery_zip = forms.FileField(
+        required=False,
+        label='Gallery ZIP',
+        help_text='Upload a ZIP of images to add them all to the gallery. Duplicates are skipped.',
+    )
+
+    class Meta:
+        model = Event
+        fields = '__all__'
+
+    def clean_gallery_zip(self):
+        upload = self.cleaned_data.get('gallery_zip')
+        if upload and not zipfile.is_zipfile(upload):
+            raise forms.ValidationError('Not a ZIP archive.')
+        if upload:
+            upload.seek(0)
+        return upload
+
+
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'starts_at', 'ends_at', 'location', 'is_public')
-    list_filter = ('starts_at', 'ends_at', 'is_public')
+    form = EventAdminForm
+    list_display = ('title', 'starts_at', 'ends_at', 'recurrence_frequency', 'location', 'is_public')
+    list_filter = ('starts_at', 'ends_at', 'recurrence_frequency', 'is_public')
     search_fields = ('title', 'description', 'location')
     prepopulated_fields = {"slug": ("title",)}
     inlines = [EventGalleryImageInline]
 
+    # re-geocode when the location text changes and the coordinates were not edited by hand
+    def save_model(self, request, obj, form, change):
+        if change and 'location' in form.changed_data and not {'latitude', 'longitude'} & set(form.changed_data):
+            obj.latitude = obj.longitude = None
+        return super().save_model(request, obj, form, change)
+
+    # stage the uploaded ZIP and import it off the request, after the inline images are saved
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        upload = form.cleaned_data.get('gallery_zip')
+        if not upload:
+            return
+        name = stage_zip(form.instance, upload)
+        if settings.GALLERY_IMPORT_IN_BACKGROUND:
+            transaction.on_commit(lambda: start_staged_import(name))
+            message = "Gallery ZIP received; its images will appear in the gallery once processed."
+        else:
+            message = "Gallery ZIP received; it will be imported by the next `import_event_gallery --staged` run."
+        self.message_user(request, message, messages.SUCCESS)
+
+
+class DuplicateFilter(admin.SimpleListFilter):
+    title = 'near duplicate'
+    parameter_name = 'duplicate'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Near duplicate'), ('no', 'Original'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(duplicate_of__isnull=False)
+        if self.value() == 'no':
+            return queryset.filter(duplicate_of__isnull=True)
+        return queryset
 
-class InquiryAdmin(admin.ModelAdmin):
+
+class InquiryAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name', 'email', 'phone', 'company_name',
-                    'country', 'job_title', 'job_details', 'status')
-    list_filter = ('status',)
+                    'country', 'job_title', 'job_details', 'status', 'duplicate_flag')
+    list_filter = ('status', 'is_suspected_spam', DuplicateFilter)
     search_fields = ('name', 'email', 'phone', 'company_name',
                      'country', 'job_title', 'job_details')
+    raw_id_fields = ('duplicate_of',)
+    readonly_fields = ('similarity',)
+    autocomplete_prefix_fields = ('name', 'email')
+    actions = ['close_as_spam']
+
+    class Media:
+        # "N new inquiries" banner fed by the live event stream (base/live.py), served under ASGI only
+        js = ('base/js/admin-live-inquiries.js',) if settings.LIVE_EVENTS_ENABLED else ()
+
+    @admin.display(description='Duplicate', ordering='similarity')
+    def duplicate_flag(self, obj):
+        if obj.duplicate_of_id is None:
+            return ''
+        label = 'Spam?' if obj.is_suspected_spam else 'Duplicate'
+        return f"{label} of #{obj.duplicate_of_id} ({obj.similarity or 0:.0%})"
+
+    @admin.action(description='Close selected inquiries as spam')
+    def close_as_spam(self, request, queryset):
+        # save() per row keeps the inquiry rollups in step
+        inquiries = list(queryset.exclude(status=InquiryStatus.CLOSED))
+        for inquiry in inquiries:
+            inquiry.status = InquiryStatus.CLOSED
+            inquiry.is_suspected_spam = True
+            inquiry.save(update_fields=['status', 'is_suspected_spam', 'updated_at'])
+        self.message_user(request, f"Closed {len(inquiries)} inquiries as spam.", messages.SUCCESS)
 
 
 class InquiryResponseAdmin(admin.ModelAdmin):
@@ -105,6 +236,13 @@ class InquiryResponseAdmin(admin.ModelAdmin):
     list_filter = ('sender_type', 'direction', 'sent_at')
     search_fields = ('inquiry__name', 'admin__username',
                      'recipient', 'subject', 'body')
+    # select2 widgets that fetch matches on demand instead of rendering every row as an <option>
+    autocomplete_fields = ('inquiry', 'admin')
+    list_select_related = ('inquiry', 'admin')
+
+
+class StaffUserAdmin(PrefixAutocompleteMixin, UserAdmin):
+    autocomplete_prefix_fields = ('username', 'email', 'first_name', 'last_name')
 
 
 # register models
@@ -115,3 +253,5 @@ admin.site.register(Article, ArticleAdmin)
 admin.site.register(Event, EventAdmin)
 admin.site.register(Inquiry, InquiryAdmin)
 admin.site.register(InquiryResponse, InquiryResponseAdmin)
+admin.site.unregister(User)
+admin.site.register(User, StaffUserAdmin)
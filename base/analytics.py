@@ -0,0 +1,176 @@
+import contextvars
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+_suspended = contextvars.ContextVar("inquiry_rollup_signals_suspended", default=False)
+
+
+# --------------------- Inquiry Rollups ---------------------
+def inquiry_rollup_key(inquiry):
+    """Return the (day, status, country) bucket an inquiry is counted in."""
+    created_at = inquiry.created_at or timezone.now()
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return created_at.date(), inquiry.status, (inquiry.country or "").strip()
+
+
+def bump_inquiry_rollup(key, delta):
+    """Add `delta` to a single rollup bucket, creating it when missing."""
+    from .models import InquiryDailyRollup
+
+    day, status, country = key
+    bucket = InquiryDailyRollup.objects.filter(day=day, status=status, country=country)
+    if bucket.update(count=F("count") + delta) or delta <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            InquiryDailyRollup.objects.create(
+                day=day, status=status, country=country, count=delta)
+    except IntegrityError:
+        # Another request created the bucket between our update and insert
+        bucket.update(count=F("count") + delta)
+
+
+@contextmanager
+def rollup_signals_suspended():
+    """Skip the per-row rollup signals inside the block; the caller adjusts the buckets in bulk."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def rollup_signals_active() -> bool:
+    return not _suspended.get()
+
+
+def record_archived_inquiries(keys):
+    """
+    Note archived inquiries (a Counter of rollup keys) in their buckets:
+    they stay in `count`, and `archived` lets rebuilds keep them.
+    """
+    from .models import InquiryDailyRollup
+
+    for (day, status, country), total in keys.items():
+        bucket = InquiryDailyRollup.objects.filter(day=day, status=status, country=country)
+        if bucket.update(archived=F("archived") + total):
+            continue
+        # The bucket was lost (e.g. to a rebuild racing the archiving): count them again
+        try:
+            with transaction.atomic():
+                InquiryDailyRollup.objects.create(
+                    day=day, status=status, country=country, count=total, archived=total)
+        except IntegrityError:
+            bucket.update(archived=F("archived") + total)
+
+
+def _archived_rollup_keys(batch_size=5000):
+    """Rollup keys of the archived inquiries (base/archive.py) no longer in the table, read from the files."""
+    from .archive import archive_files, read_archive
+    from .models import Inquiry
+
+    root = str(settings.INQUIRY_ARCHIVE_ROOT)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"No inquiry archive at {root}")
+
+    keys = {}
+    for path in archive_files():
+        for row in read_archive(path):
+            created_at = parse_datetime(row["created_at"])
+            if timezone.is_aware(created_at):
+                created_at = timezone.localtime(created_at)
+            # A re-archived inquiry keeps its last line
+            keys[row["id"]] = (created_at.date(), row["status"], (row["country"] or "").strip())
+    ids = list(keys)
+    for i in range(0, len(ids), batch_size):
+        # Rows whose delete failed after they were written are counted from the table
+        for pk in Inquiry.objects.filter(pk__in=ids[i:i + batch_size]).values_list("id", flat=True):
+            del keys[pk]
+    return Counter(keys.values())
+
+
+def rebuild_inquiry_rollups(batch_size=1000, from_archive=False):
+    """
+    Recompute every rollup bucket from the Inquiry table, keeping the
+    archived counts already stored. With from_archive=True the archived
+    counts are recounted from the archive files instead, which must be
+    present on this host. Returns the bucket count.
+    """
+    from .models import Inquiry, InquiryDailyRollup
+
+    rows = (
+        Inquiry.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "status", "country")
+        .annotate(total=Count("id"))
+    )
+
+    # Several raw country spellings can collapse into one bucket once stripped
+    buckets = {}
+    for row in rows.iterator():
+        key = (row["day"], row["status"], (row["country"] or "").strip())
+        buckets[key] = buckets.get(key, 0) + row["total"]
+
+    if from_archive:
+        archived = _archived_rollup_keys()
+    else:
+        archived = Counter({
+            (day, status, country): total for day, status, country, total in
+            InquiryDailyRollup.objects.filter(archived__gt=0).values_list("day", "status", "country", "archived")
+        })
+    for key, total in archived.items():
+        buckets[key] = buckets.get(key, 0) + total
+
+    with transaction.atomic():
+        InquiryDailyRollup.objects.all().delete()
+        InquiryDailyRollup.objects.bulk_create(
+            [
+                InquiryDailyRollup(
+                    day=day, status=status, country=country, count=total, archived=archived[day, status, country])
+                for (day, status, country), total in buckets.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(buckets)
+
+
+def inquiry_rollup_summary(days=14, top_countries=5):
+    """Inquiry totals for the admin dashboard, read from the rollup table only."""
+    from .models import InquiryDailyRollup, InquiryStatus
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    recent = InquiryDailyRollup.objects.filter(day__gte=since).order_by()
+
+    per_day = dict(recent.values_list("day").annotate(total=Sum("count")))
+    per_status = dict(recent.values_list("status").annotate(total=Sum("count")))
+    countries = (
+        recent.exclude(country="")
+        .values_list("country")
+        .annotate(total=Sum("count"))
+        .order_by("-total")[:top_countries]
+    )
+
+    return {
+        "days": [
+            (since + timedelta(days=i), per_day.get(since + timedelta(days=i), 0))
+            for i in range(days)
+        ],
+        "statuses": [
+            (label, per_status.get(value, 0)) for value, label in InquiryStatus.choices
+        ],
+        "countries": list(countries),
+        "total": sum(per_day.values()),
+    }
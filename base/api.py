@@ -0,0 +1,231 @@
+import base64
+import binascii
+import json
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from .surrogate import tag
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    pass
+
+
+# --------------------- Resources ---------------------
+class Resource:
+    """
+    A read-only API resource.
+
+    `fields` maps public field names to ORM lookups; `default_fields` is
+    what a request without ?fields= gets, so heavy text columns are only
+    read when a client explicitly asks for them. Listings are keyset
+    paginated on (`cursor_field`, id).
+    """
+
+    def __init__(self, queryset, fields, default_fields, cursor_field, descending, detail_url=None):
+        self.get_queryset = queryset
+        self.fields = fields
+        self.default_fields = default_fields
+        self.cursor_field = cursor_field
+        self.descending = descending
+        self.detail_url = detail_url
+
+    def ordering(self):
+        prefix = "-" if self.descending else ""
+        return (f"{prefix}{self.cursor_field}", f"{prefix}id")
+
+    def parse_fields(self, request):
+        raw = request.GET.get("fields")
+        if not raw:
+            return list(self.default_fields)
+        names = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields and name != "url"]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+        return names
+
+    def rows(self, queryset, names):
+        """Serialise straight from .values(), without instantiating models."""
+        lookups = {self.fields[name]: name for name in names if name in self.fields}
+        if "url" in names:
+            lookups.setdefault("slug", "slug")
+        columns = list(dict.fromkeys([*lookups, self.cursor_field, "id"]))
+        url_template = reverse(self.detail_url, args=["__slug__"]) if self.detail_url else None
+        model_name = queryset.model._meta.model_name
+
+        for row in queryset.values(*columns):
+            tag(f"{model_name}:{row['id']}")
+            item = {lookups[column]: row[column] for column in lookups if lookups[column] in names}
+            if "url" in names:
+                item["url"] = url_template.replace("__slug__", row["slug"]) if url_template else None
+            if item.get("image"):
+                item["image"] = default_storage.url(item["image"])
+            yield item, row
+
+
+def _published_articles():
+    from .models import Article
+    return Article.objects.published()
+
+
+def _case_studies():
+    from .models import CaseStudy
+    return CaseStudy.objects.published()
+
+
+def _active_services():
+    from .models import Service
+    return Service.objects.published()
+
+
+def _public_events():
+    from .models import Event
+    return Event.objects.published()
+
+
+RESOURCES = {
+    "articles": Resource(
+        _published_articles,
+        fields={
+            "id": "id", "title": "title", "slug": "slug", "excerpt": "excerpt",
+            "content": "content", "image": "image", "published_at": "published_at",
+            "updated_at": "updated_at", "author": "author__username",
+            "auto_excerpt": "auto_excerpt", "content_html": "content_html", "toc": "toc",
+            "word_count": "word_count", "reading_time": "reading_time",
+        },
+        default_fields=("id", "title", "slug", "excerpt", "auto_excerpt", "reading_time", "published_at", "url"),
+        cursor_field="created_at", descending=True, detail_url="articles_details",
+    ),
+    "case-studies": Resource(
+        _case_studies,
+        fields={
+            "id": "id", "title": "title", "slug": "slug", "summary": "summary",
+            "problem": "problem", "solution": "solution", "results": "results",
+            "client_name": "client_name", "client_company": "client_company",
+            "client_job_title": "client_job_title", "image": "image",
+            "published_at": "published_at", "updated_at": "updated_at",
+        },
+        default_fields=("id", "title", "slug", "summary", "client_company", "published_at", "url"),
+        cursor_field="created_at", descending=True, detail_url="case_studies_details",
+    ),
+    "services": Resource(
+        _active_services,
+        fields={
+            "id": "id", "title": "title", "slug": "slug", "description": "description",
+            "short_description": "short_description", "category": "category",
+            "status": "status", "icon": "icon", "image": "image", "features": "features",
+            "updated_at": "updated_at",
+        },
+        default_fields=("id", "title", "slug", "short_description", "category", "icon"),
+        cursor_field="title", descending=False,
+    ),
+    "events": Resource(
+        _public_events,
+        fields={
+            "id": "id", "title": "title", "slug": "slug", "description": "description",
+            "starts_at": "starts_at", "ends_at": "ends_at", "location": "location",
+            "updated_at": "updated_at",
+        },
+        default_fields=("id", "title", "slug", "starts_at", "ends_at", "location", "url"),
+        cursor_field="starts_at", descending=False, detail_url="events_details",
+    ),
+}
+
+
+# --------------------- Cursors ---------------------
+def encode_cursor(value, pk) -> str:
+    # Full-precision isoformat; DjangoJSONEncoder would cut microseconds
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    raw = json.dumps([value, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, resource):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error, TypeError):
+        raise ApiError("Invalid cursor")
+    # A crafted cursor must not reach the query as some other type
+    if type(pk) is not int or not isinstance(value, str):
+        raise ApiError("Invalid cursor")
+    if resource.cursor_field.endswith("_at"):
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            value = None
+        # Cursors are issued with an offset; a naive one was not made here
+        if value is None or timezone.is_naive(value):
+            raise ApiError("Invalid cursor")
+    return value, pk
+
+
+def after_cursor(resource, value, pk):
+    op = "lt" if resource.descending else "gt"
+    field = resource.cursor_field
+    return Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk})
+
+
+# --------------------- Views ---------------------
+def _json(data, status=200):
+    return HttpResponse(
+        json.dumps(data, cls=DjangoJSONEncoder), status=status, content_type="application/json")
+
+
+@require_GET
+def api_list(request, resource):
+    """Keyset-paginated listing: ?fields=a,b&limit=N&cursor=..."""
+    spec = RESOURCES.get(resource)
+    if spec is None:
+        raise Http404("Unknown resource")
+
+    try:
+        names = spec.parse_fields(request)
+        try:
+            limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            raise ApiError("'limit' must be an integer")
+
+        queryset = spec.get_queryset().order_by(*spec.ordering())
+        cursor = request.GET.get("cursor")
+        if cursor:
+            queryset = queryset.filter(after_cursor(spec, *decode_cursor(cursor, spec)))
+    except ApiError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # One extra row tells us whether there is a next page
+    tag(queryset.model._meta.model_name)
+    rows = list(spec.rows(queryset[:limit + 1], names))
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1][1]
+        params = request.GET.copy()
+        params["cursor"] = encode_cursor(last_row[spec.cursor_field], last_row["id"])
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    return _json({"results": [item for item, _ in rows], "next": next_url})
+
+
+@require_GET
+def api_detail(request, resource, slug):
+    spec = RESOURCES.get(resource)
+    if spec is None:
+        raise Http404("Unknown resource")
+
+    try:
+        names = spec.parse_fields(request)
+    except ApiError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    for item, _ in spec.rows(spec.get_queryset().filter(slug=slug)[:1], names):
+        return _json(item)
+    raise Http404("Not found")
@@ -0,0 +1,117 @@
+import glob
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .analytics import inquiry_rollup_key, record_archived_inquiries, rollup_signals_suspended
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Archive Files ---------------------
+def archive_path(created_at) -> str:
+    """Archive file for the (local) month of `created_at`, e.g. <INQUIRY_ARCHIVE_ROOT>/inquiries-2024-03.ndjson.gz"""
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return os.path.join(str(settings.INQUIRY_ARCHIVE_ROOT), f"inquiries-{created_at:%Y-%m}.ndjson.gz")
+
+
+def _row(instance) -> dict:
+    return {f.attname: getattr(instance, f.attname) for f in instance._meta.concrete_fields}
+
+
+def _append(path, lines):
+    """
+    Append NDJSON lines as a new gzip member; concatenated members read back
+    as one stream (gzip.open, zcat). Synced before the rows are deleted.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as handle:
+        with gzip.GzipFile(fileobj=handle, mode="wb") as archive:
+            for line in lines:
+                archive.write(line.encode("utf-8") + b"\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def archive_files():
+    return sorted(glob.glob(os.path.join(str(settings.INQUIRY_ARCHIVE_ROOT), "inquiries-*.ndjson.gz")))
+
+
+def read_archive(path):
+    """Yield the archived inquiries (dicts with their `responses`) stored in one archive file."""
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
+
+
+# --------------------- Archiving ---------------------
+def archivable_inquiries(days=None):
+    """Closed inquiries created more than `days` (default INQUIRY_RETENTION_DAYS) ago."""
+    from .models import Inquiry, InquiryStatus
+
+    days = settings.INQUIRY_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    # Served by the (status, -created_at) index
+    return Inquiry.objects.filter(status=InquiryStatus.CLOSED, created_at__lt=cutoff)
+
+
+def archive_batch(ids, days=None):
+    """
+    Write the inquiries `ids` (with their responses) to their monthly archive
+    files, then delete them. Rows are locked through `archivable_inquiries`,
+    so one reopened or edited since it was listed is skipped. The rollup
+    buckets keep counting archived inquiries (their `archived` column).
+    Returns the number archived.
+    """
+    from .models import Inquiry, InquiryResponse
+
+    with transaction.atomic():
+        inquiries = list(
+            archivable_inquiries(days).select_for_update().filter(pk__in=ids).order_by("created_at", "id"))
+        if not inquiries:
+            return 0
+        responses = {}
+        for response in InquiryResponse.objects.filter(inquiry_id__in=[i.pk for i in inquiries]).order_by("sent_at", "id"):
+            responses.setdefault(response.inquiry_id, []).append(_row(response))
+
+        months = {}
+        for inquiry in inquiries:
+            line = json.dumps({**_row(inquiry), "responses": responses.get(inquiry.pk, [])}, cls=DjangoJSONEncoder)
+            months.setdefault(archive_path(inquiry.created_at), []).append(line)
+        # A failed delete leaves the rows in place and their lines in the file;
+        # a later run archives them again, so readers keep the last line per id
+        for path, lines in months.items():
+            _append(path, lines)
+
+        # Archived inquiries stay counted in the rollups, marked so rebuilds keep them
+        with rollup_signals_suspended():
+            Inquiry.objects.filter(pk__in=[i.pk for i in inquiries]).delete()
+        record_archived_inquiries(Counter(inquiry_rollup_key(i) for i in inquiries))
+    return len(inquiries)
+
+
+def archive_closed_inquiries(days=None, batch_size=500):
+    """
+    Move closed inquiries older than the retention window out of the
+    database into gzipped NDJSON files, one per month of `created_at`, so
+    the admin changelist, email lookups and status filters only work on
+    recent and open leads. Returns (inquiries archived, files written).
+    """
+    queryset = archivable_inquiries(days).order_by("created_at", "id")
+    archived, paths = 0, set()
+    while True:
+        batch = list(queryset.values_list("pk", "created_at")[:batch_size])
+        if not batch:
+            break
+        paths.update(archive_path(created_at) for _, created_at in batch)
+        archived += archive_batch([pk for pk, _ in batch], days)
+        logger.info(f"Archived {archived} closed inquiries")
+    return archived, len(paths)
@@ -0,0 +1,176 @@
+import io
+import os
+import re
+from django.conf import settings
+from django.template.loader import get_template
+
+STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+IMAGE_VARIANTS = (("avif", "image/avif"), ("webp", "image/webp"))
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+# --------------------- Minification ---------------------
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace, leaving string literals untouched."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    parts = STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[i])
+        part = re.sub(r"\s*([{};,>])\s*", r"\1", part)
+        parts[i] = re.sub(r":\s+", ":", part).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def _js_code_at_line_ends(lines):
+    """
+    For each line, whether it starts and ends in plain code rather than
+    inside a template literal or block comment. Quotes and `${...}`
+    nesting are followed; regex literals are assumed free of backticks.
+    """
+    stack = ["code"]  # "code", "template" or "comment"; braces count per ${...} level
+    braces = [0]
+    for line in lines:
+        start = stack[-1] == "code"
+        i, quote = 0, None
+        while i < len(line):
+            char, pair = line[i], line[i:i + 2]
+            state = stack[-1]
+            if state == "comment":
+                if pair == "*/":
+                    stack.pop()
+                    i += 1
+            elif state == "template":
+                if char == "\\":
+                    i += 1
+                elif char == "`":
+                    stack.pop()
+                elif pair == "${":
+                    stack.append("code")
+                    braces.append(0)
+                    i += 1
+            elif quote:
+                if char == "\\":
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif pair == "//":
+                break
+            elif pair == "/*":
+                stack.append("comment")
+                i += 1
+            elif char == "`":
+                stack.append("template")
+            elif char == "{":
+                braces[-1] += 1
+            elif char == "}":
+                if braces[-1] == 0 and len(braces) > 1:
+                    braces.pop()
+                    stack.pop()  # end of ${...}, back in the template
+                else:
+                    braces[-1] -= 1
+            i += 1
+        yield line, start, stack[-1] == "code"
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservative JS minifier: drops comment-only lines, indentation and
+    blank lines but keeps line breaks, so automatic semicolon insertion and
+    string/regex literals are never affected. Lines inside template literals
+    and multi-line comments are kept as they are.
+    """
+    kept = []
+    for line, starts_in_code, ends_in_code in _js_code_at_line_ends(js.splitlines()):
+        if starts_in_code:
+            line = line.lstrip()
+        if ends_in_code:
+            line = line.rstrip()
+        if starts_in_code and ends_in_code:
+            single_comment = line.startswith("/*") and line.find("*/", 2) == len(line) - 2
+            if not line or line.startswith("//") or single_comment:
+                continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+# --------------------- Critical CSS ---------------------
+def split_blocks(css: str):
+    """Yield (prelude, body) for each top-level block of a minified stylesheet."""
+    depth, start, prelude = 0, 0, ""
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                yield prelude, css[start:i]
+                start = i + 1
+
+
+def critical_template_html() -> str:
+    return "\n".join(
+        get_template(name).template.source for name in settings.CRITICAL_CSS_TEMPLATES
+    )
+
+
+def extract_critical_css(css: str, html: str) -> str:
+    """
+    Keep the rules whose class/id selectors all appear in the above-the-fold
+    templates (plus element-only rules and the @keyframes they use).
+    """
+    words = set(re.findall(r"[\w-]+", html))
+
+    def used(selector):
+        return all(name in words for name in re.findall(r"[.#]([\w-]+)", selector))
+
+    def filter_rules(css):
+        kept, keyframes = [], {}
+        for prelude, body in split_blocks(css):
+            if prelude.startswith("@keyframes"):
+                keyframes[prelude.split()[-1]] = f"{prelude}{{{body}}}"
+            elif prelude.startswith("@media") or prelude.startswith("@supports"):
+                inner, inner_keyframes = filter_rules(body)
+                keyframes.update(inner_keyframes)
+                if inner:
+                    kept.append(f"{prelude}{{{inner}}}")
+            elif prelude.startswith("@") or any(used(s) for s in prelude.split(",")):
+                kept.append(f"{prelude}{{{body}}}")
+        return "".join(kept), keyframes
+
+    kept, keyframes = filter_rules(minify_css(css))
+    animations = "".join(body for name, body in keyframes.items() if name in kept)
+    return kept + animations
+
+
+def critical_name(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.critical{ext}"
+
+
+# --------------------- Images ---------------------
+def variant_name(path: str, ext: str) -> str:
+    return f"{os.path.splitext(path)[0]}.{ext}"
+
+
+def image_variants(data: bytes):
+    """Yield (ext, bytes) WebP/AVIF encodings of a PNG/JPEG image."""
+    from PIL import Image, ImageOps, features
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        for ext, _ in IMAGE_VARIANTS:
+            if not features.check(ext):
+                continue
+            out = io.BytesIO()
+            if ext == "webp":
+                image.save(out, "WEBP", quality=settings.STATIC_WEBP_QUALITY, method=6)
+            else:
+                image.save(out, "AVIF", quality=settings.STATIC_AVIF_QUALITY)
+            yield ext, out.getvalue()
@@ -0,0 +1,42 @@
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+
+
+# --------------------- Content Versions ---------------------
+def _version_key(name: str) -> str:
+    return f"content-version:{name}"
+
+
+def _versions():
+    # Every process must see a bump, so versions live in the shared cache
+    return caches[settings.CONTENT_VERSION_CACHE]
+
+
+def content_version(name: str) -> str:
+    """
+    Current version token for a group of content (e.g. "events"). Cache keys
+    and ETags built from it go stale as soon as the content changes: at once
+    in the process that bumped it, within CONTENT_VERSION_LOCAL_TTL seconds
+    elsewhere.
+    """
+    version = cache.get(_version_key(name))
+    if version is not None:
+        return version
+
+    shared = _versions()
+    version = shared.get(_version_key(name))
+    if version is None:
+        # First reader (or evicted): don't overwrite a token another process just stored
+        version = f"{time.time_ns():x}"
+        if not shared.add(_version_key(name), version, None):
+            version = shared.get(_version_key(name), version)
+    cache.set(_version_key(name), version, settings.CONTENT_VERSION_LOCAL_TTL)
+    return version
+
+
+def bump_content_version(name: str) -> str:
+    version = f"{time.time_ns():x}"
+    _versions().set(_version_key(name), version, None)
+    cache.set(_version_key(name), version, settings.CONTENT_VERSION_LOCAL_TTL)
+    return version
@@ -0,0 +1,85 @@
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from .cache import content_version
+from .models import Service, ServiceCategory, ServiceStatus
+
+FACETS_KEY = "service-catalog-facets"
+# Statuses the public catalog may show; inactive services stay hidden
+CATALOG_STATUSES = (ServiceStatus.ACTIVE, ServiceStatus.COMING_SOON)
+MAX_FEATURE_FACETS = 50
+
+
+class CatalogError(Exception):
+    pass
+
+
+# --------------------- Facet Counts ---------------------
+def compute_service_facets():
+    """Counts of catalog services per category, status and feature, in one pass over three columns."""
+    categories, statuses, features = Counter(), Counter(), Counter()
+    rows = Service.objects.filter(status__in=CATALOG_STATUSES).order_by().values_list("category", "status", "features")
+    for category, status, service_features in rows:
+        categories[category] += 1
+        statuses[status] += 1
+        if isinstance(service_features, list):
+            features.update({str(f) for f in service_features})
+    labels = dict(ServiceCategory.choices)
+    return {
+        "category": [
+            {"value": value, "label": labels.get(value, value), "count": count}
+            for value, count in sorted(categories.items())
+        ],
+        "status": [{"value": value, "count": count} for value, count in sorted(statuses.items())],
+        "features": [
+            {"value": value, "count": count}
+            for value, count in sorted(features.items(), key=lambda item: (-item[1], item[0]))[:MAX_FEATURE_FACETS]
+        ],
+    }
+
+
+def _facets_key() -> str:
+    # Versioned in the shared cache, so a Service change reaches every process
+    return f"{FACETS_KEY}:{content_version('services')}"
+
+
+def refresh_service_facets():
+    facets = compute_service_facets()
+    cache.set(_facets_key(), facets, settings.CATALOG_FACETS_TIMEOUT)
+    return facets
+
+
+def service_facets():
+    """Cached facet counts; the Service save/delete signal (base/signals.py) bumps their version."""
+    facets = cache.get(_facets_key())
+    return facets if facets is not None else refresh_service_facets()
+
+
+# --------------------- Filtering ---------------------
+def _choices(values, allowed, name):
+    unknown = [v for v in values if v not in allowed]
+    if unknown:
+        raise CatalogError(f"Unknown {name}: {', '.join(unknown)}")
+    return values
+
+
+def filter_services(params):
+    """
+    Catalog services matching ?category=&status= (comma-separated, any of)
+    and every ?feature= given. The features test is a single JSONB
+    containment (`@>`) served by the service_features_gin index.
+    """
+    queryset = Service.objects.filter(status__in=CATALOG_STATUSES)
+
+    categories = [c for c in params.get("category", "").split(",") if c]
+    if categories:
+        queryset = queryset.filter(category__in=_choices(categories, ServiceCategory.values, "category"))
+
+    statuses = [s for s in params.get("status", "").split(",") if s]
+    if statuses:
+        queryset = queryset.filter(status__in=_choices(statuses, CATALOG_STATUSES, "status"))
+
+    features = [f.strip() for f in params.getlist("feature") if f.strip()]
+    if features:
+        queryset = queryset.filter(features__contains=features)
+    return queryset
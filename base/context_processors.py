@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.functional import lazy
+from .cache import content_version
+
+
+def _site_version() -> str:
+    return f"{settings.RELEASE}-{content_version('site')}"
+
+
+def site_version(request):
+    """
+    Version token for {% cache %} fragments of shared layout components.
+    Lazy, so pages without those fragments (admin, JSON) don't read it.
+    """
+    return {
+        "site_version": lazy(_site_version, str)(),
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+    }
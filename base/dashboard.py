@@ -0,0 +1,29 @@
+from django.utils.translation import gettext_lazy as _
+from jet.dashboard.dashboard import DefaultIndexDashboard
+from jet.dashboard.modules import DashboardModule
+from .analytics import inquiry_rollup_summary
+
+
+# --------------------- Dashboard Modules ---------------------
+class InquiryRollupModule(DashboardModule):
+    """Inquiry volume by day, status and country, read from the rollup table only."""
+    title = _('Inquiry volume')
+    template = 'base/dashboard/inquiry_rollups.html'
+    days = 14
+
+    def settings_dict(self):
+        return {'days': self.days}
+
+    def load_settings(self, settings):
+        self.days = settings.get('days', self.days)
+
+    def init_with_context(self, context):
+        self.summary = inquiry_rollup_summary(days=self.days)
+
+
+# --------------------- Dashboards ---------------------
+class IndexDashboard(DefaultIndexDashboard):
+    def init_with_context(self, context):
+        super().init_with_context(context)
+        self.available_children.append(InquiryRollupModule)
+        self.children.append(InquiryRollupModule(column=1, order=1))
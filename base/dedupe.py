@@ -0,0 +1,201 @@
+import re
+import zlib
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 8 rows per band: candidate pairs start around 0.7 Jaccard
+SHINGLE_WORDS = 3
+PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+
+# Fixed seed: changing it or the constants above invalidates every stored
+# signature and bucket (run `manage.py detect_duplicate_inquiries` afterwards)
+_rng = np.random.default_rng(39)
+_A = _rng.integers(1, 2**32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = _rng.integers(0, 2**63, BANDS, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# --------------------- MinHash ---------------------
+def shingles(text: str) -> np.ndarray:
+    """CRC32 hashes of the distinct word 3-grams of `text` (empty if it is too short to judge)."""
+    words = TOKEN_RE.findall((text or "").lower())
+    if len(words) < settings.INQUIRY_DUPLICATE_MIN_WORDS:
+        return np.empty(0, dtype=np.uint64)
+    grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signatures(shingle_sets) -> np.ndarray:
+    """
+    MinHash signatures (N x NUM_PERM, uint32) for non-empty shingle sets.
+    All shingles are hashed in a single (NUM_PERM x total) pass and reduced
+    per text with np.minimum.reduceat, so batches cost one NumPy call.
+    """
+    flat = np.concatenate(shingle_sets)
+    starts = np.cumsum([0] + [len(s) for s in shingle_sets[:-1]])
+    hashed = (_A[:, None] * flat[None, :] + _B[:, None]) % PRIME
+    return (np.minimum.reduceat(hashed, starts, axis=1).T & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def bucket_keys(sigs: np.ndarray) -> np.ndarray:
+    """Fold each band of each signature into one signed 64-bit bucket key (N x BANDS)."""
+    bands = sigs.astype(np.uint64).reshape(len(sigs), BANDS, ROWS)
+    return ((bands * _BAND_MIX).sum(axis=2, dtype=np.uint64) + _BAND_SALT).view(np.int64)
+
+
+def similarity(sig: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of `sig` to each row of `others`."""
+    return (others == sig).mean(axis=1)
+
+
+def inquiry_text(inquiry) -> str:
+    return inquiry.job_details
+
+
+# --------------------- Matching ---------------------
+def _best_match(sig, candidates):
+    """
+    Pick the most similar candidate above INQUIRY_DUPLICATE_THRESHOLD.
+    `candidates` are (id, signature, root id, email) tuples; returns
+    (root id, similarity, root email) or None.
+    """
+    if not candidates:
+        return None
+    scores = similarity(sig, np.stack([c[1] for c in candidates]))
+    best = int(np.argmax(scores))
+    if scores[best] < settings.INQUIRY_DUPLICATE_THRESHOLD:
+        return None
+    pk, _, root_id, email = candidates[best]
+    return root_id or pk, float(scores[best]), email
+
+
+def _stored_candidates(keys):
+    from .models import InquiryLshBucket, InquirySignature
+
+    matching = InquiryLshBucket.objects.filter(bucket__in=[int(k) for k in keys]).values("inquiry_id")
+    rows = InquirySignature.objects.filter(inquiry_id__in=matching).values_list(
+        "inquiry_id", "minhash", "inquiry__duplicate_of_id", "inquiry__duplicate_of__email", "inquiry__email")
+    return {
+        pk: (pk, np.frombuffer(bytes(minhash), dtype=np.uint32), root_id, root_email or email)
+        for pk, minhash, root_id, root_email, email in rows
+    }
+
+
+def _flag(inquiry, match):
+    from .models import InquiryStatus
+
+    root_id, score, root_email = match
+    inquiry.duplicate_of_id = root_id
+    inquiry.similarity = round(score, 3)
+    # The same text from a different address is a mass submission, not a resubmission
+    # Never clears a flag set by hand
+    inquiry.is_suspected_spam = inquiry.is_suspected_spam or (root_email or "").lower() != (inquiry.email or "").lower()
+    if settings.INQUIRY_DUPLICATE_AUTO_CLOSE:
+        inquiry.status = InquiryStatus.CLOSED
+
+
+def screen_inquiry(inquiry):
+    """
+    Check a not-yet-saved inquiry against the LSH index and flag it when it
+    nearly matches an earlier one. Returns (signature, keys) to pass to
+    `index_inquiry` once it has a pk, or None when the text is too short.
+    """
+    shingle_set = shingles(inquiry_text(inquiry))
+    if not len(shingle_set):
+        return None
+    sig = signatures([shingle_set])[0]
+    keys = bucket_keys(sig[None, :])[0]
+    match = _best_match(sig, list(_stored_candidates(keys).values()))
+    if match:
+        _flag(inquiry, match)
+    return sig, keys
+
+
+def index_inquiry(inquiry_id, sig, keys):
+    from .models import InquiryLshBucket, InquirySignature
+
+    InquirySignature.objects.create(inquiry_id=inquiry_id, minhash=sig.tobytes())
+    InquiryLshBucket.objects.bulk_create(
+        [InquiryLshBucket(inquiry_id=inquiry_id, bucket=int(k)) for k in keys])
+
+
+# --------------------- Backfill ---------------------
+def rebuild(batch_size=250):
+    """
+    Recompute signatures, buckets and flags for every inquiry in creation
+    order (so each is compared only with earlier ones). Signatures are
+    computed per batch with the vectorised `signatures`; candidates come
+    from earlier batches (one query per batch) and earlier rows of the same
+    batch. Returns (indexed, flagged).
+    """
+    from .models import Inquiry, InquiryLshBucket, InquirySignature
+
+    with transaction.atomic():
+        InquiryLshBucket.objects.all().delete()
+        InquirySignature.objects.all().delete()
+        # Only the spam flags this detector set (a near duplicate from another
+        # address); flags set by hand, e.g. the close_as_spam action, stay
+        Inquiry.objects.filter(is_suspected_spam=True, duplicate_of__isnull=False).exclude(
+            email__iexact=F("duplicate_of__email")).update(is_suspected_spam=False)
+        Inquiry.objects.exclude(duplicate_of=None, similarity=None).update(duplicate_of=None, similarity=None)
+
+    indexed = flagged = 0
+    queryset = Inquiry.objects.order_by("created_at", "id").only("id", "email", "job_details", "status", "is_suspected_spam")
+    batch = []
+    for inquiry in queryset.iterator(chunk_size=batch_size):
+        batch.append(inquiry)
+        if len(batch) >= batch_size:
+            counts = _rebuild_batch(batch)
+            indexed, flagged, batch = indexed + counts[0], flagged + counts[1], []
+    if batch:
+        counts = _rebuild_batch(batch)
+        indexed, flagged = indexed + counts[0], flagged + counts[1]
+    return indexed, flagged
+
+
+def _rebuild_batch(inquiries):
+    from .models import Inquiry, InquiryLshBucket, InquirySignature
+
+    shingle_sets = [shingles(inquiry_text(i)) for i in inquiries]
+    inquiries = [i for i, s in zip(inquiries, shingle_sets) if len(s)]
+    shingle_sets = [s for s in shingle_sets if len(s)]
+    if not inquiries:
+        return 0, 0
+
+    sigs = signatures(shingle_sets)
+    keys = bucket_keys(sigs)
+    unique_keys = [int(k) for k in np.unique(keys)]
+
+    # Earlier batches: bucket -> ids, id -> candidate
+    candidates = _stored_candidates(unique_keys)
+    buckets = {}
+    for bucket, pk in InquiryLshBucket.objects.filter(bucket__in=unique_keys).values_list("bucket", "inquiry_id"):
+        buckets.setdefault(bucket, set()).add(pk)
+
+    flagged = []
+    for n, inquiry in enumerate(inquiries):
+        row_keys = [int(k) for k in keys[n]]
+        ids = set().union(*(buckets.get(k, ()) for k in row_keys))
+        match = _best_match(sigs[n], [candidates[pk] for pk in ids if pk in candidates])
+        if match:
+            _flag(inquiry, match)
+            flagged.append(inquiry)
+        # Later rows of this batch are compared with this one too
+        candidates[inquiry.pk] = (inquiry.pk, sigs[n], inquiry.duplicate_of_id, match[2] if match else inquiry.email)
+        for k in row_keys:
+            buckets.setdefault(k, set()).add(inquiry.pk)
+
+    with transaction.atomic():
+        InquirySignature.objects.bulk_create(
+            [InquirySignature(inquiry_id=i.pk, minhash=sigs[n].tobytes()) for n, i in enumerate(inquiries)])
+        InquiryLshBucket.objects.bulk_create(
+            [InquiryLshBucket(inquiry_id=i.pk, bucket=int(k)) for n, i in enumerate(inquiries) for k in keys[n]])
+        Inquiry.objects.bulk_update(flagged, ["duplicate_of", "similarity", "is_suspected_spam", "status"])
+    return len(inquiries), len(flagged)
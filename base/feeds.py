@@ -0,0 +1,135 @@
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+FEED_ITEMS = 20
+
+# Listing pages and the models whose changes alter them
+STATIC_PAGES = {
+    "home": ("casestudy", "article", "event"),
+    "services": ("service",),
+    "case-study": ("casestudy", "softwaresolution"),
+    "articles": ("article",),
+    "events": ("event",),
+    "ai-assistant": (),
+    "contact": (),
+}
+
+
+def _w3c(value):
+    return value.isoformat(timespec="seconds") if value else ""
+
+
+def _models():
+    from .models import Article, CaseStudy, Event, Service, SoftwareSolution
+    return {
+        "article": Article,
+        "casestudy": CaseStudy,
+        "event": Event,
+        "service": Service,
+        "softwaresolution": SoftwareSolution,
+    }
+
+
+def detail_sections():
+    """Sitemap sections backed by a detail page per row: name -> (queryset, url name)."""
+    from .models import Article, CaseStudy, Event
+    return {
+        "articles": (Article.objects.published(), "articles_details"),
+        "case-studies": (CaseStudy.objects.published(), "case_studies_details"),
+        "events": (Event.objects.published(), "events_details"),
+    }
+
+
+def _last_modified(model_names):
+    models = _models()
+    dates = [
+        models[name].objects.order_by().aggregate(last=Max("updated_at"))["last"]
+        for name in model_names
+    ]
+    dates = [d for d in dates if d]
+    return max(dates) if dates else None
+
+
+# --------------------- Sitemaps ---------------------
+def build_sitemap_index(handle, base_url):
+    size = settings.SITEMAP_PAGE_SIZE
+    handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'.encode())
+
+    entries = [("pages", 1, _last_modified({m for models in STATIC_PAGES.values() for m in models}))]
+    for name, (queryset, _) in detail_sections().items():
+        stats = queryset.order_by().aggregate(last=Max("updated_at"))
+        count = queryset.count()
+        entries += [(name, page, stats["last"]) for page in range(1, (count - 1) // size + 2)]
+
+    for name, page, lastmod in entries:
+        loc = escape(f"{base_url}{reverse('sitemap_section', args=[name, page])}")
+        lastmod = f"<lastmod>{_w3c(lastmod)}</lastmod>" if lastmod else ""
+        handle.write(f"  <sitemap><loc>{loc}</loc>{lastmod}</sitemap>\n".encode())
+    handle.write(b"</sitemapindex>\n")
+
+
+def build_sitemap_page(handle, base_url, section, page):
+    """
+    Write one page of a sitemap section. Rows are streamed from the database
+    in pk order, so memory stays flat regardless of SITEMAP_PAGE_SIZE.
+    """
+    handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'.encode())
+
+    if section == "pages":
+        rows = ((reverse(name), _last_modified(models)) for name, models in STATIC_PAGES.items())
+    else:
+        queryset, url_name = detail_sections()[section]
+        size = settings.SITEMAP_PAGE_SIZE
+        rows = (
+            (reverse(url_name, args=[slug]), updated_at)
+            for slug, updated_at in queryset.order_by("pk")
+            .values_list("slug", "updated_at")[(page - 1) * size:page * size]
+            .iterator(chunk_size=2000)
+        )
+
+    buffer = []
+    for path, lastmod in rows:
+        lastmod = f"<lastmod>{_w3c(lastmod)}</lastmod>" if lastmod else ""
+        buffer.append(f"  <url><loc>{escape(base_url + path)}</loc>{lastmod}</url>\n")
+        if len(buffer) >= 1000:
+            handle.write("".join(buffer).encode())
+            buffer = []
+    handle.write("".join(buffer).encode())
+    handle.write(b"</urlset>\n")
+
+
+# --------------------- Article Feeds ---------------------
+def build_articles_feed(handle, base_url, fmt):
+    from .models import Article
+
+    feed_class = Atom1Feed if fmt == "atom" else Rss201rev2Feed
+    feed = feed_class(
+        title="AI-Solutions Articles",
+        link=f"{base_url}{reverse('articles')}",
+        description="Insights, trends and developments in AI from AI-Solutions.",
+        feed_url=f"{base_url}{reverse('articles_feed', args=[fmt])}",
+        language="en",
+    )
+
+    articles = (
+        Article.objects.published()
+        .select_related("author")
+        .defer("content", "content_html")
+        .order_by("-published_at", "-id")[:FEED_ITEMS]
+    )
+    for article in articles:
+        link = f"{base_url}{reverse('articles_details', args=[article.slug])}"
+        feed.add_item(
+            title=article.title,
+            link=link,
+            unique_id=link,
+            description=article.display_excerpt,
+            pubdate=article.published_at or article.created_at,
+            updateddate=article.updated_at,
+            author_name=article.author.get_username() if article.author else None,
+        )
+    handle.write(feed.writeString("utf-8").encode())
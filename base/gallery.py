@@ -0,0 +1,254 @@
+import io
+import os
+import hashlib
+import logging
+import threading
+import uuid
+import zipfile
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from .cache import bump_content_version
+from .surrogate import purge
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+
+# --------------------- Image Processing ---------------------
+def process_image(data: bytes, max_dimension: int, quality: int):
+    """
+    Decode, apply EXIF orientation, downscale and re-encode one image.
+    Runs in a worker process, so it must not touch Django.
+    Returns (bytes, extension).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        if "A" in image.getbands():
+            image.save(out, "PNG", optimize=True)
+            return out.getvalue(), "png"
+        image.convert("RGB").save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        return out.getvalue(), "jpg"
+
+
+class ImagePool:
+    """
+    One worker pool for a whole import. Falls back to processing in this
+    process when workers can't be started (e.g. serverless hosts) or the
+    pool breaks (a worker killed mid-batch); that batch is then redone here.
+    """
+
+    def __init__(self, workers):
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.worker = partial(
+            process_image,
+            max_dimension=settings.GALLERY_MAX_DIMENSION,
+            quality=settings.GALLERY_JPEG_QUALITY,
+        )
+
+    def process(self, datas):
+        """(bytes, extension) or the exception raised, for each image."""
+        if self.executor is not None and len(datas) > 1:
+            try:
+                return list(self.executor.map(_safe, [self.worker] * len(datas), datas))
+            except (BrokenExecutor, OSError, NotImplementedError) as e:
+                logger.warning(f"Process pool unavailable, importing serially: {e}")
+                self.close()
+        return [_safe(self.worker, data) for data in datas]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _safe(worker, data):
+    try:
+        return worker(data)
+    except Exception as e:
+        return e
+
+
+# --------------------- Import ---------------------
+def iter_zip_images(file):
+    """Yield (name, bytes) for the image entries of a ZIP archive, in name order."""
+    with zipfile.ZipFile(file) as archive:
+        entries = sorted(
+            (info for info in archive.infolist()
+             if not info.is_dir()
+             and not os.path.basename(info.filename).startswith(".")
+             and "__MACOSX" not in info.filename
+             and info.filename.lower().endswith(IMAGE_EXTENSIONS)),
+            key=lambda info: info.filename,
+        )
+        for info in entries:
+            if info.file_size > settings.GALLERY_MAX_FILE_BYTES:
+                logger.warning(f"Skipping {info.filename}: larger than GALLERY_MAX_FILE_BYTES")
+                continue
+            yield os.path.basename(info.filename), archive.read(info)
+
+
+def iter_directory_images(path):
+    """Yield (name, bytes) for the image files of a directory, in name order."""
+    for name in sorted(os.listdir(path)):
+        full_path = os.path.join(path, name)
+        if os.path.isfile(full_path) and name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(full_path, "rb") as handle:
+                yield name, handle.read()
+
+
+def import_gallery(event, images, workers=None, batch_size=None):
+    """
+    Add (name, bytes) images to an event's gallery.
+
+    Images are de-duplicated by SHA-256 against the event's existing gallery
+    and within the upload, processed in one process pool `batch_size` at a
+    time (so memory stays bounded), then inserted with one bulk_create per
+    batch and sequential `order` values after the current last image.
+
+    Returns a dict with ``created``, ``duplicates`` and ``failed`` counts.
+    """
+    from .models import EventGalleryImage
+
+    workers = workers or settings.GALLERY_IMPORT_WORKERS or os.cpu_count() or 1
+    batch_size = batch_size or workers * 4
+    upload_to = EventGalleryImage._meta.get_field("image")
+
+    seen = set(
+        EventGalleryImage.objects.filter(event=event)
+        .exclude(content_hash="")
+        .values_list("content_hash", flat=True)
+    )
+    order = (EventGalleryImage.objects.filter(event=event).aggregate(last=Max("order"))["last"] or 0) + 1
+    stats = {"created": 0, "duplicates": 0, "failed": 0}
+
+    def flush(pool, batch):
+        nonlocal order
+        rows, saved = [], []
+        results = pool.process([data for _, _, data in batch])
+        try:
+            for (name, digest, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Could not import {name}: {result}")
+                    stats["failed"] += 1
+                    continue
+                content, ext = result
+                row = EventGalleryImage(event=event, order=order, content_hash=digest)
+                filename = upload_to.generate_filename(row, f"{event.slug}-{digest[:16]}.{ext}")
+                row.image.name = upload_to.storage.save(filename, ContentFile(content))
+                saved.append(row.image.name)
+                rows.append(row)
+                order += 1
+            EventGalleryImage.objects.bulk_create(rows)
+        except BaseException:
+            # Files without rows would never be shown or cleaned up
+            for name in saved:
+                upload_to.storage.delete(name)
+            raise
+        stats["created"] += len(rows)
+
+    try:
+        with ImagePool(workers) as pool:
+            batch = []
+            for name, data in images:
+                digest = hashlib.sha256(data).hexdigest()
+                if digest in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(digest)
+                batch.append((name, digest, data))
+                if len(batch) >= batch_size:
+                    flush(pool, batch)
+                    batch = []
+            if batch:
+                flush(pool, batch)
+    finally:
+        # Batches already stored stay, so expire their pages even when a later one fails
+        if stats["created"]:
+            transaction.on_commit(partial(gallery_changed, event))
+    return stats
+
+
+def gallery_changed(event):
+    """
+    Expire the cached pages of an event whose gallery was filled with
+    bulk_create, which sends none of the signals a single image save does.
+    """
+    bump_content_version("events")
+    purge([f"event:{event.pk}"])
+
+
+# --------------------- Staged Imports ---------------------
+def staging_name(event) -> str:
+    return f"{settings.GALLERY_STAGING_DIR}/{event.pk}-{uuid.uuid4().hex}.zip"
+
+
+def stage_zip(event, upload) -> str:
+    """Keep an uploaded ZIP in storage until it is imported; returns its storage name."""
+    return default_storage.save(staging_name(event), upload)
+
+
+def staged_imports():
+    """Storage names of the ZIPs waiting to be imported."""
+    try:
+        _, files = default_storage.listdir(settings.GALLERY_STAGING_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(f"{settings.GALLERY_STAGING_DIR}/{name}" for name in files if name.endswith(".zip"))
+
+
+def import_staged(name, workers=None):
+    """
+    Import a staged ZIP into its event's gallery and delete it. Running
+    it twice is harmless: the second run only finds duplicates.
+    Returns the import stats, or None when the ZIP was dropped.
+    """
+    from .models import Event
+
+    event_id = os.path.basename(name).split("-", 1)[0]
+    event = Event.objects.filter(pk=event_id).first()
+    if event is None:
+        logger.warning(f"Dropping staged gallery import {name}: event {event_id} no longer exists")
+        default_storage.delete(name)
+        return None
+    try:
+        with default_storage.open(name, "rb") as handle:
+            stats = import_gallery(event, iter_zip_images(handle), workers=workers)
+    except zipfile.BadZipFile as e:
+        logger.warning(f"Dropping staged gallery import {name}: {e}")
+        default_storage.delete(name)
+        return None
+    # Other failures keep the ZIP for `import_event_gallery --staged`
+    default_storage.delete(name)
+    logger.info(f"Imported staged gallery {name} into '{event.title}': {stats}")
+    return stats
+
+
+def _import_staged_in_background(name):
+    try:
+        import_staged(name)
+    except Exception as e:
+        logger.error(f"Staged gallery import {name} failed: {e}")
+    finally:
+        connection.close()
+
+
+def start_staged_import(name):
+    """Import a staged ZIP in a background thread, after the admin response is sent."""
+    threading.Thread(target=_import_staged_in_background, args=(name,), name="gallery-import", daemon=True).start()
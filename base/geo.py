@@ -0,0 +1,105 @@
+import csv
+import math
+import re
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+# --------------------- Offline Geocoder ---------------------
+def _normalize(name: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", name.lower())).strip()
+
+
+@lru_cache(maxsize=1)
+def gazetteer() -> dict:
+    """Normalised place name (and aliases) -> (latitude, longitude), from GEOCODER_GAZETTEER."""
+    places = {}
+    with open(settings.GEOCODER_GAZETTEER, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            point = (float(row["latitude"]), float(row["longitude"]))
+            for name in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                places.setdefault(_normalize(name), point)
+    return places
+
+
+def geocode(location: str):
+    """
+    Resolve free-text locations such as "Hotel Yak & Yeti, Kathmandu, Nepal"
+    to (latitude, longitude) without any network call. The whole string is
+    tried first, then each comma-separated part, then word runs within the
+    parts, most specific first. Returns None when nothing matches.
+    """
+    places = gazetteer()
+    parts = [_normalize(p) for p in (location or "").split(",")]
+    for candidate in [_normalize(location or ""), *parts]:
+        if candidate in places:
+            return places[candidate]
+    for part in parts:
+        words = part.split()
+        for size in range(min(len(words), 4), 0, -1):
+            for i in range(len(words) - size + 1):
+                point = places.get(" ".join(words[i:i + size]))
+                if point:
+                    return point
+    return None
+
+
+# --------------------- Nearby Queries ---------------------
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Q filter for the lat/lng box around a point, so the (latitude, longitude)
+    index narrows the scan before exact distances are computed. Boxes that
+    cross the antimeridian are split in two.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        return Q(latitude__range=(min_lat, max_lat), longitude__isnull=False)
+
+    dlng = radius_km / (KM_PER_DEGREE * cos_lat)
+    west, east = longitude - dlng, longitude + dlng
+    box = Q(latitude__range=(min_lat, max_lat))
+    if west < -180:
+        return box & (Q(longitude__gte=west + 360) | Q(longitude__lte=east))
+    if east > 180:
+        return box & (Q(longitude__gte=west) | Q(longitude__lte=east - 360))
+    return box & Q(longitude__range=(west, east))
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes) -> np.ndarray:
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest(queryset, latitude, longitude, radius_km, limit, fields):
+    """
+    Rows of `queryset` within `radius_km` of the point, nearest first, as
+    dicts of `fields` plus ``distance_km``. One query: the bounding box is
+    an index range scan and only the rows inside it are ranked (in NumPy).
+    """
+    box = queryset.filter(bounding_box(latitude, longitude, radius_km)).order_by()
+    rows = list(box.values(*fields, "latitude", "longitude"))
+    if not rows:
+        return []
+    distances = haversine_km(
+        latitude, longitude,
+        np.fromiter((r["latitude"] for r in rows), dtype=float, count=len(rows)),
+        np.fromiter((r["longitude"] for r in rows), dtype=float, count=len(rows)),
+    )
+    order = np.argsort(distances, kind="stable")
+    result = []
+    for i in order[:limit]:
+        if distances[i] > radius_km:
+            break
+        row = rows[i]
+        row["distance_km"] = round(float(distances[i]), 2)
+        result.append(row)
+    return result
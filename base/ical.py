@@ -0,0 +1,67 @@
+from datetime import timezone as dt_timezone
+
+
+# --------------------- iCalendar (RFC 5545) ---------------------
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def format_datetime(value) -> str:
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line to 75 octets, continuation lines starting with a space."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def render_calendar(events, name: str, domain: str) -> str:
+    """
+    Render an iterable of event dicts (title, slug, url, description,
+    starts_at, ends_at, location, updated_at, recurring) as a VCALENDAR
+    document.
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//AI-Solutions//Events//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ]
+    for event in events:
+        lines += [
+            "BEGIN:VEVENT",
+            # Each occurrence of a recurring event is its own VEVENT
+            f"UID:{event['slug']}-{format_datetime(event['starts_at'])}@{domain}"
+            if event.get("recurring") else f"UID:{event['slug']}@{domain}",
+            f"DTSTAMP:{format_datetime(event['updated_at'])}",
+            f"DTSTART:{format_datetime(event['starts_at'])}",
+        ]
+        if event["ends_at"]:
+            lines.append(f"DTEND:{format_datetime(event['ends_at'])}")
+        lines.append(f"SUMMARY:{escape_text(event['title'])}")
+        if event["description"]:
+            lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+        if event["location"]:
+            lines.append(f"LOCATION:{escape_text(event['location'])}")
+        lines += [f"URL:{event['url']}", "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return "".join(f"{fold_line(line)}\r\n" for line in lines)
@@ -0,0 +1,203 @@
+import os
+import re
+import hashlib
+import logging
+from datetime import timezone as dt_timezone
+from email import policy
+from email.parser import BytesParser
+from email.utils import getaddresses, parsedate_to_datetime
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.html import strip_tags
+from .live import publish_bulk
+
+logger = logging.getLogger(__name__)
+
+MSGID_RE = re.compile(r"<([^<>\s]+)>")
+_parser = BytesParser(policy=policy.default)
+
+
+# --------------------- Mailbox Readers ---------------------
+def iter_mbox(path):
+    """
+    Yield raw messages from an mbox file one at a time. Unlike
+    mailbox.mbox, no table of contents is built, so memory does not grow
+    with the size of the file.
+    """
+    with open(path, "rb") as handle:
+        lines = []
+        for line in handle:
+            if line.startswith(b"From ") and (not lines or lines[-1] in (b"\n", b"\r\n")):
+                if lines:
+                    yield b"".join(lines[:-1])
+                lines = []
+                continue
+            # mboxrd escaping: ">From " -> "From "
+            if line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+                line = line[1:]
+            lines.append(line)
+        if lines:
+            yield b"".join(lines)
+
+
+def iter_maildir(path):
+    """Yield raw messages from the cur/ and new/ folders of a Maildir."""
+    for folder in ("cur", "new"):
+        directory = os.path.join(path, folder)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    with open(entry.path, "rb") as handle:
+                        yield handle.read()
+
+
+def iter_mailbox(path):
+    return iter_maildir(path) if os.path.isdir(path) else iter_mbox(path)
+
+
+# --------------------- Parsing ---------------------
+def hash_message_id(message_id: str) -> str:
+    return hashlib.blake2b(message_id.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+def message_ids(value) -> list:
+    return MSGID_RE.findall(str(value or ""))
+
+
+def message_text(message) -> str:
+    part = message.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return ""
+    try:
+        text = part.get_content()
+    except (LookupError, UnicodeDecodeError):
+        text = part.get_payload(decode=True).decode("utf-8", "replace")
+    if part.get_content_subtype() == "html":
+        text = strip_tags(text)
+    return text.strip()
+
+
+def parse_message(raw: bytes):
+    """
+    Parse one raw message into the fields needed for an inbound
+    InquiryResponse, or None if it has no sender.
+
+    ``hash`` identifies the message (its Message-ID, or the content when it
+    has none); ``parents`` lists the hashed ids it replies to, nearest first.
+    """
+    message = _parser.parsebytes(raw)
+    senders = [addr for _, addr in getaddresses([str(message.get("From", ""))]) if addr]
+    if not senders:
+        return None
+
+    ids = message_ids(message.get("Message-ID"))
+    if ids:
+        digest = hash_message_id(ids[0])
+    else:
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    # In-Reply-To first, then References from the most recent ancestor back
+    parents = message_ids(message.get("In-Reply-To")) + message_ids(message.get("References"))[::-1]
+
+    try:
+        sent_at = parsedate_to_datetime(str(message["Date"]))
+        if timezone.is_naive(sent_at):
+            sent_at = timezone.make_aware(sent_at, dt_timezone.utc)
+    except (TypeError, ValueError, IndexError):
+        sent_at = timezone.now()
+
+    recipients = [addr for _, addr in getaddresses([str(message.get("To", ""))]) if addr]
+    return {
+        "hash": digest,
+        "parents": list(dict.fromkeys(hash_message_id(i) for i in parents)),
+        "sender": senders[0].lower(),
+        "recipient": recipients[0][:255] if recipients else "",
+        "subject": str(message.get("Subject", ""))[:255],
+        "body": message_text(message),
+        "sent_at": sent_at,
+    }
+
+
+# --------------------- Ingestion ---------------------
+def _latest_inquiries(emails):
+    """Map lower-cased email -> id of the newest inquiry from that address."""
+    from .models import Inquiry
+
+    # Case-insensitive match, served by the Upper(email) inquiry_email_prefix_idx
+    rows = (
+        Inquiry.objects.alias(email_key=Upper("email")).filter(email_key__in={e.upper() for e in emails})
+        .order_by("created_at", "id").values_list("email", "id")
+    )
+    latest = {}
+    for email, pk in rows:
+        latest[email.lower()] = pk
+    return latest
+
+
+def ingest_batch(parsed):
+    """
+    Thread a batch of parsed messages onto inquiries and bulk insert them.
+
+    A message joins the inquiry of the nearest ancestor already stored
+    (earlier in this batch or in the database); failing that, the newest
+    inquiry from the sender's address. Returns (created, duplicates,
+    unthreaded).
+    """
+    from .models import Direction, InquiryResponse, SenderType
+
+    hashes = [m["hash"] for m in parsed]
+    parents = {p for m in parsed for p in m["parents"]}
+    known = dict(
+        InquiryResponse.objects.filter(message_id_hash__in=set(hashes) | parents)
+        .values_list("message_id_hash", "inquiry_id")
+    )
+    by_email = _latest_inquiries({m["sender"] for m in parsed})
+
+    rows, duplicates, unthreaded = [], 0, 0
+    for m in parsed:
+        if m["hash"] in known:
+            duplicates += 1
+            continue
+        inquiry_id = next((known[p] for p in m["parents"] if p in known), None) or by_email.get(m["sender"])
+        if inquiry_id is None:
+            unthreaded += 1
+            continue
+        known[m["hash"]] = inquiry_id
+        rows.append(InquiryResponse(
+            inquiry_id=inquiry_id,
+            sender_type=SenderType.CUSTOMER,
+            direction=Direction.INBOUND,
+            recipient=m["recipient"],
+            subject=m["subject"],
+            body=m["body"],
+            sent_at=m["sent_at"],
+            message_id_hash=m["hash"],
+        ))
+    InquiryResponse.objects.bulk_create(rows, ignore_conflicts=True)
+    publish_bulk("responses", len(rows), [row.inquiry_id for row in rows])
+    return len(rows), duplicates, unthreaded
+
+
+def ingest_mailbox(path, batch_size=1000):
+    """
+    Stream a mbox file or Maildir into inbound InquiryResponse rows.
+    Yields per-batch (created, duplicates, unthreaded, failed) counts.
+    """
+    batch, failed = [], 0
+    for raw in iter_mailbox(path):
+        try:
+            parsed = parse_message(raw)
+        except Exception as e:
+            logger.warning(f"Could not parse message: {e}")
+            parsed = None
+        if parsed is None:
+            failed += 1
+            continue
+        batch.append(parsed)
+        if len(batch) >= batch_size:
+            yield (*ingest_batch(batch), failed)
+            batch, failed = [], 0
+    if batch or failed:
+        yield (*(ingest_batch(batch) if batch else (0, 0, 0)), failed)
@@ -0,0 +1,148 @@
+import csv
+import gzip
+import io
+import json
+import logging
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
+from .live import publish_bulk
+from .utils import phone_validator
+
+logger = logging.getLogger(__name__)
+
+LEAD_FIELDS = ("name", "email", "phone", "company_name", "country", "job_title", "job_details")
+FORMATS = ("csv", "ndjson")
+
+
+# --------------------- Reading ---------------------
+def detect_format(path) -> str:
+    name = path.lower().removesuffix(".gz")
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def iter_leads(path, format=None):
+    """
+    Stream (line number, row dict) from a CSV file with a header row or an
+    NDJSON file (one object per line), optionally gzipped. Unknown columns
+    are ignored; unreadable NDJSON lines yield None as the row.
+    """
+    format = format or detect_format(path)
+    raw = gzip.open(path, "rb") if path.lower().endswith(".gz") else open(path, "rb")
+    with io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as handle:
+        if format == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row if isinstance(row, dict) else None
+
+
+def iter_batches(path, format=None, batch_size=5000):
+    batch = []
+    for item in iter_leads(path, format):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --------------------- Validation ---------------------
+def clean_batch(items):
+    """
+    Normalise a batch of (line, row) pairs into lead dicts keyed by
+    lower-cased email (the last row for an address wins). Phone numbers are
+    checked together against phone_validator's pattern rather than raising
+    a ValidationError per row. Returns (leads, rejected [(line, reason)]).
+    """
+    from .models import Inquiry
+
+    # Text fields have no max_length; a None slice bound keeps the whole value
+    limits = {name: Inquiry._meta.get_field(name).max_length for name in LEAD_FIELDS}
+    rows, rejected = [], []
+    for line, row in items:
+        if row is None:
+            rejected.append((line, "unreadable line"))
+            continue
+        lead = {name: str(row.get(name) or "").strip()[:limits[name]] for name in LEAD_FIELDS}
+        if not lead["name"] or not lead["email"]:
+            rejected.append((line, "name and email are required"))
+            continue
+        try:
+            validate_email(lead["email"])
+        except ValidationError:
+            rejected.append((line, f"invalid email {lead['email']!r}"))
+            continue
+        rows.append((line, lead))
+
+    pattern = phone_validator.regex
+    valid_phone = [not lead["phone"] or bool(pattern.search(lead["phone"])) for _, lead in rows]
+
+    leads = {}
+    for (line, lead), ok in zip(rows, valid_phone):
+        if not ok:
+            rejected.append((line, f"invalid phone {lead['phone']!r}"))
+            continue
+        leads[lead["email"].lower()] = lead
+    return leads, rejected
+
+
+# --------------------- Upsert ---------------------
+def upsert_batch(leads):
+    """
+    Upsert cleaned leads onto Inquiry by email: the newest inquiry from an
+    address is updated with the non-empty imported values, other addresses
+    get a new inquiry. One lookup on the email index and one
+    bulk_create(update_conflicts=True) per batch. Returns (created, updated).
+
+    Inquiry.email is not unique (repeat inquiries from one address are kept
+    and linked by the near-duplicate check), so the conflict target is the
+    primary key of the inquiry the lookup matched.
+    """
+    from .models import Inquiry
+
+    if not leads:
+        return 0, 0
+    # Case-insensitive match, served by the Upper(email) inquiry_email_prefix_idx
+    matches = Inquiry.objects.alias(email_key=Upper("email")).filter(email_key__in=[e.upper() for e in leads])
+    existing = {}
+    for inquiry in matches.order_by("created_at", "id"):
+        existing[inquiry.email.lower()] = inquiry
+
+    now = timezone.now()
+    created, updated = [], []
+    for key, lead in leads.items():
+        inquiry = existing.get(key)
+        if inquiry is None:
+            created.append(Inquiry(**lead, created_at=now))
+            continue
+        changed = False
+        for name, value in lead.items():
+            if value and name != "email" and getattr(inquiry, name) != value:
+                setattr(inquiry, name, value)
+                changed = True
+        if changed:
+            inquiry.updated_at = now
+            updated.append(inquiry)
+
+    # Matched rows go back in as an INSERT ... ON CONFLICT (id) DO UPDATE, which
+    # is far cheaper than bulk_update's per-field CASE expressions
+    with transaction.atomic():
+        Inquiry.objects.bulk_create(
+            updated + created, batch_size=1000, update_conflicts=True, unique_fields=["id"],
+            update_fields=[f for f in LEAD_FIELDS if f != "email"] + ["updated_at"],
+        )
+        # bulk_create sends no post_save; ids are filled in where the backend returns them
+        publish_bulk("inquiries", len(created), [inquiry.pk for inquiry in created])
+    return len(created), len(updated)
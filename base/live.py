@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Hub ---------------------
+class Hub:
+    """
+    Fans events out to the connected streams of this process. Each
+    subscriber is an asyncio.Queue plus the loop it lives on, so events can
+    be dispatched from any thread (the LISTEN thread, a sync view's
+    on_commit) and streams may run on different loops.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.LIVE_EVENTS_QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        start_listener()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def dispatch(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                self.unsubscribe((loop, queue))  # loop closed under a dropped stream
+
+
+def _offer(queue, event):
+    # A stalled client loses its oldest events rather than growing without bound
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+hub = Hub()
+
+
+# --------------------- Publishing ---------------------
+def uses_notify() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def publish(event):
+    """
+    Announce `event` (a small JSON-able dict with a "type") to every admin
+    stream once the current transaction commits. On Postgres it goes out
+    through NOTIFY, which reaches the listeners of all processes; elsewhere
+    it is dispatched to the streams of this process only. Nothing is sent
+    when LIVE_EVENTS_ENABLED is off, as no stream can be listening.
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        return
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+    if uses_notify():
+        # NOTIFY is transactional: delivered on commit, dropped on rollback
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [settings.LIVE_EVENTS_CHANNEL, payload])
+    else:
+        transaction.on_commit(lambda: hub.dispatch(json.loads(payload)))
+
+
+def publish_bulk(type, count, inquiry_ids=()):
+    """
+    One event for rows written with bulk_create, which sends no post_save:
+    `type` is "inquiries" or "responses", with the row count and up to
+    LIVE_EVENTS_MAX_IDS of the inquiry ids involved.
+    """
+    if not count:
+        return
+    ids = sorted({pk for pk in inquiry_ids if pk is not None})
+    try:
+        publish({"type": type, "count": count, "inquiry_ids": ids[:settings.LIVE_EVENTS_MAX_IDS]})
+    except Exception as e:
+        logger.error(f"Could not announce {count} {type}: {e}")
+
+
+# --------------------- LISTEN Thread ---------------------
+_listener = {"thread": None}
+_listener_lock = threading.Lock()
+
+
+def start_listener():
+    """Start this process's single LISTEN connection (Postgres only) on first subscription."""
+    if not uses_notify() or _listener["thread"] is not None:
+        return
+    with _listener_lock:
+        if _listener["thread"] is None:
+            _listener["thread"] = threading.Thread(target=_listen_forever, name="live-events-listener", daemon=True)
+            _listener["thread"].start()
+
+
+def _listen_forever():
+    delay = 1
+    while True:
+        try:
+            _listen()
+        except Exception as e:
+            logger.error(f"Live events listener failed, reconnecting in {delay}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+        else:
+            delay = 1
+
+
+def _listen():
+    """
+    Hold a dedicated autocommit connection in LISTEN and forward every
+    notification to the hub. Blocks in select(), so idle streams cost no
+    queries at all.
+    """
+    wrapper = connections["default"]
+    conn = wrapper.Database.connect(**wrapper.get_connection_params())
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{settings.LIVE_EVENTS_CHANNEL}"')
+        while True:
+            if select.select([conn], [], [], 60) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    hub.dispatch(json.loads(notify.payload))
+                except ValueError:
+                    logger.warning(f"Ignoring malformed live event: {notify.payload[:200]}")
+    finally:
+        conn.close()
+
+
+# --------------------- Stream ---------------------
+async def _events():
+    subscriber = hub.subscribe()
+    _, queue = subscriber
+    try:
+        yield f"retry: {settings.LIVE_EVENTS_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.LIVE_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@require_GET
+async def inquiry_events(request):
+    """
+    Server-sent events for staff: `inquiry` when one is submitted and
+    `response` when a reply is added. Costs the session/user lookup once
+    per connection; nothing is polled afterwards. Needs an ASGI server to
+    hold many streams (config/asgi.py).
+    """
+    # Under WSGI the response would be read to the end before anything is
+    # sent; 204 tells EventSource not to reconnect
+    if not settings.LIVE_EVENTS_ENABLED or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not (user.is_active and user.is_staff):
+        return HttpResponseForbidden()
+
+    response = StreamingHttpResponse(_events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache, private"
+    response["X-Accel-Buffering"] = "no"  # stop nginx-style proxies from buffering the stream
+    return response
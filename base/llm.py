@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """You are the assistant on the AI Solutions website. Answer briefly and only
+from the company information below; for quotes or anything you are unsure
+about, point the visitor to the contact page.
+{context}"""
+
+
+class BackendUnavailable(Exception):
+    """The generation backend failed, timed out, is saturated or is switched off by the breaker."""
+
+
+# --------------------- Backends ---------------------
+class OpenAIChatBackend:
+    """
+    OpenAI-compatible `POST /chat/completions` over an httpx.AsyncClient
+    (the hosted API, any compatible server, or the local stub below).
+    """
+
+    def __init__(self):
+        import httpx
+
+        headers = {"Authorization": f"Bearer {settings.LLM_API_KEY}"} if settings.LLM_API_KEY else {}
+        self.client = httpx.AsyncClient(
+            base_url=settings.LLM_API_BASE.rstrip("/"), headers=headers, timeout=settings.LLM_TIMEOUT)
+
+    async def generate(self, messages) -> str:
+        response = await self.client.post("/chat/completions", json={
+            "model": settings.LLM_MODEL,
+            "messages": messages,
+            "max_tokens": settings.LLM_MAX_TOKENS,
+        })
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# --------------------- Circuit Breaker ---------------------
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive errors; while open every call is
+    refused. After `reset` seconds a single trial call is let through and
+    closes the breaker again if it succeeds.
+    """
+
+    def __init__(self, failures, reset):
+        self.failures, self.reset = failures, reset
+        self.consecutive = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self.trial and time.monotonic() - self.opened_at >= self.reset:
+            self.trial = True
+            return True
+        return False
+
+    def success(self):
+        self.consecutive, self.opened_at, self.trial = 0, None, False
+
+    def failure(self):
+        self.consecutive += 1
+        if self.trial or self.consecutive >= self.failures:
+            if self.opened_at is None or self.trial:
+                logger.warning(f"LLM circuit breaker open after {self.consecutive} consecutive failures")
+            self.opened_at = time.monotonic()
+        self.trial = False
+
+
+# --------------------- Client ---------------------
+class GenerationClient:
+    """
+    Process-wide gateway to the LLM_BACKEND. Calls run on one event loop in
+    a daemon thread, so the sync view shares a single HTTP connection pool,
+    concurrency semaphore (LLM_MAX_CONCURRENCY), circuit breaker and table
+    of in-flight prompts: identical prompts issued while one is pending
+    wait for that call instead of starting another.
+    """
+
+    def __init__(self, backend=None):
+        self.backend_path = backend or settings.LLM_BACKEND
+        self.backend = None
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET)
+        self.inflight = {}
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self.thread.start()
+
+    async def _call(self, messages) -> str:
+        if not self.breaker.allow():
+            raise BackendUnavailable("circuit breaker open")
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), settings.LLM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Saturation is not a backend fault; a trial slot is handed back
+            self.breaker.trial = False
+            raise BackendUnavailable(f"{settings.LLM_MAX_CONCURRENCY} calls already in flight")
+        try:
+            if self.backend is None:
+                self.backend = import_string(self.backend_path)()
+            text = await asyncio.wait_for(self.backend.generate(messages), settings.LLM_TIMEOUT)
+        except Exception as e:
+            self.breaker.failure()
+            raise BackendUnavailable(f"{type(e).__name__}: {e}") from e
+        finally:
+            self.semaphore.release()
+        self.breaker.success()
+        return text
+
+    async def agenerate(self, messages) -> str:
+        key = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        task = self.inflight.get(key)
+        if task is None:
+            task = self.inflight[key] = asyncio.ensure_future(self._call(messages))
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # A caller giving up must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def generate(self, messages) -> str:
+        """Blocking call from any thread; raises BackendUnavailable on any failure."""
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(messages), self.loop)
+        try:
+            return future.result(settings.LLM_QUEUE_TIMEOUT + settings.LLM_TIMEOUT + 1)
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            future.cancel()
+            raise BackendUnavailable(f"{type(e).__name__}: {e}") from e
+
+    def close(self):
+        if self.backend is not None and hasattr(self.backend, "aclose"):
+            asyncio.run_coroutine_threadsafe(self.backend.aclose(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GenerationClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GenerationClient()
+    return _client
+
+
+def build_messages(query, memory=None):
+    """Chat messages for a question: company context, the earlier turns of the conversation, the question."""
+    from .utils import get_company_context
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT.format(context=get_company_context())}]
+    if memory is not None:
+        messages += [{"role": "user", "content": turn} for turn in memory.turns]
+    messages.append({"role": "user", "content": query})
+    return messages
+
+
+def generate(query, memory=None) -> str:
+    return get_client().generate(build_messages(query, memory))
+
+
+# --------------------- Local Stub ---------------------
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions that echoes the question after `server.delay` seconds."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        if self.server.fail or not self.path.endswith("/chat/completions"):
+            self.send_error(503 if self.server.fail else 404)
+            return
+        question = body.get("messages", [{}])[-1].get("content", "")
+        payload = json.dumps({
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"Stub answer to: {question}"}}],
+        }).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first
+
+    def log_message(self, format, *args):
+        logger.debug(f"LLM stub: {format % args}")
+
+
+def stub_server(host="127.0.0.1", port=0, delay=0.0, fail=False) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the hosted API, for tests and benchmarks. Point
+    LLM_API_BASE at f"http://{host}:{server.server_port}/v1"; `delay`,
+    `fail` and the `requests` counter can be changed while it runs.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.delay, server.fail, server.requests, server.lock = delay, fail, 0, threading.Lock()
+    return server
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from base.archive import archivable_inquiries, archive_closed_inquiries
+
+
+class Command(BaseCommand):
+    help = "Move closed inquiries older than the retention window into monthly NDJSON.gz archive files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Retention window in days (default INQUIRY_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the inquiries that would be archived")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = archivable_inquiries(options["days"]).count()
+            self.stdout.write(f"{count} closed inquiries would be archived")
+            return
+        archived, files = archive_closed_inquiries(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} closed inquiries into {files} monthly files"))
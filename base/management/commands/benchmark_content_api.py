@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from base.api import api_list
+from base.views import all_events_page, articles_page, case_study_list, services
+
+
+class Command(BaseCommand):
+    help = "Compare JSON content API response times with the equivalent HTML listing renders"
+
+    PAIRS = (
+        ("articles", articles_page, "/articles/"),
+        ("case-studies", case_study_list, "/case-study/"),
+        ("services", services, "/services/"),
+        ("events", all_events_page, "/events/"),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=20)
+
+    def measure(self, view, request, iterations, **kwargs):
+        view(request, **kwargs)  # warm up templates and caches
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view(request, **kwargs)
+        return (time.perf_counter() - start) * 1000 / iterations
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        iterations = options["iterations"]
+
+        self.stdout.write(f"{'resource':<14}{'api ms':>10}{'html ms':>10}{'speedup':>10}")
+        for resource, page_view, path in self.PAIRS:
+            api_request = factory.get(f"/api/v1/{resource}/", {"limit": options["limit"]})
+            api_ms = self.measure(api_list, api_request, iterations, resource=resource)
+            html_ms = self.measure(page_view, factory.get(path), iterations)
+            self.stdout.write(
+                f"{resource:<14}{api_ms:>10.2f}{html_ms:>10.2f}{html_ms / api_ms:>9.1f}x")
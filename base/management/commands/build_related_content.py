@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from base.related import index_path, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the related-content neighbours of every published item"
+
+    def handle(self, *args, **options):
+        items, rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} related links for {items} items (vectors in {index_path()})"))
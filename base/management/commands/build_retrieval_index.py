@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from base.retrieval import build_index, index_path
+
+
+class Command(BaseCommand):
+    help = "Rebuild the AI assistant's local retrieval index from site content"
+
+    def handle(self, *args, **options):
+        index = build_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} chunks ({len(index.vocab)} terms) into {index_path()}"))
@@ -0,0 +1,23 @@
+from time import perf_counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from base.analytics import rebuild_inquiry_rollups
+from base.dedupe import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute MinHash signatures, LSH buckets and near-duplicate flags for all inquiries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=250)
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        indexed, flagged = rebuild(batch_size=options["batch_size"])
+        if flagged and settings.INQUIRY_DUPLICATE_AUTO_CLOSE:
+            # Auto-closed rows were bulk updated, bypassing the rollup signals
+            rebuild_inquiry_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} inquiries, flagged {flagged} near duplicates "
+            f"in {perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from base.geo import geocode
+from base.models import Event
+
+
+class Command(BaseCommand):
+    help = "Fill event coordinates from their location text using the bundled gazetteer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-geocode events that already have coordinates")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        events = Event.objects.exclude(location="").only("id", "location", "latitude", "longitude")
+        if not options["all"]:
+            events = events.filter(latitude__isnull=True)
+
+        batch, updated, unresolved = [], 0, 0
+        for event in events.iterator(chunk_size=options["batch_size"]):
+            point = geocode(event.location)
+            if point is None:
+                unresolved += 1
+                continue
+            event.latitude, event.longitude = point
+            batch.append(event)
+            if len(batch) >= options["batch_size"]:
+                updated += Event.objects.bulk_update(batch, ["latitude", "longitude"])
+                batch = []
+        if batch:
+            updated += Event.objects.bulk_update(batch, ["latitude", "longitude"])
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {updated} events ({unresolved} locations not found)"))
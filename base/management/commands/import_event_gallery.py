@@ -0,0 +1,44 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from base.gallery import import_gallery, import_staged, iter_directory_images, iter_zip_images, staged_imports
+from base.models import Event
+
+
+class Command(BaseCommand):
+    help = "Bulk import a directory (or ZIP archive) of images into an event's gallery, or the ZIPs staged from the admin"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event", nargs="?", help="Slug of the event")
+        parser.add_argument("path", nargs="?", help="Directory or .zip file of images")
+        parser.add_argument("--staged", action="store_true", help="Import the ZIPs uploaded through the admin")
+        parser.add_argument("--workers", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["staged"]:
+            names = staged_imports()
+            for name in names:
+                stats = import_staged(name, workers=options["workers"])
+                self.stdout.write(f"{name}: {stats if stats is not None else 'dropped'}")
+            self.stdout.write(self.style.SUCCESS(f"Processed {len(names)} staged gallery imports"))
+            return
+        if not options["event"] or not options["path"]:
+            raise CommandError("Give an event slug and a path, or --staged")
+
+        try:
+            event = Event.objects.get(slug=options["event"])
+        except Event.DoesNotExist:
+            raise CommandError(f"No event with slug '{options['event']}'")
+
+        path = options["path"]
+        if os.path.isdir(path):
+            images = iter_directory_images(path)
+        elif os.path.isfile(path):
+            images = iter_zip_images(path)
+        else:
+            raise CommandError(f"'{path}' is not a directory or file")
+
+        stats = import_gallery(event, images, workers=options["workers"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']} images into '{event.title}' "
+            f"({stats['duplicates']} duplicates skipped, {stats['failed']} failed)"
+        ))
@@ -0,0 +1,45 @@
+import os
+from time import perf_counter
+from django.core.management.base import BaseCommand, CommandError
+from base.analytics import rebuild_inquiry_rollups
+from base.leads import FORMATS, clean_batch, iter_batches, upsert_batch
+
+
+class Command(BaseCommand):
+    help = "Stream leads from a CSV or NDJSON file (optionally .gz) into inquiries, upserting on email"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--show-rejected", type=int, default=20, help="Rejected lines to list at the end")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"'{path}' does not exist")
+
+        created = updated = read = 0
+        rejected = []
+        start = perf_counter()
+        for items in iter_batches(path, options["format"], options["batch_size"]):
+            batch_start = perf_counter()
+            leads, batch_rejected = clean_batch(items)
+            batch_created, batch_updated = upsert_batch(leads)
+            read, created, updated = read + len(items), created + batch_created, updated + batch_updated
+            rejected += batch_rejected
+            self.stdout.write(
+                f"{read} rows read: +{batch_created} created, {batch_updated} updated, "
+                f"{len(batch_rejected)} rejected ({len(items) / (perf_counter() - batch_start):.0f} rows/s, "
+                f"{read / (perf_counter() - start):.0f} rows/s overall)"
+            )
+
+        if created or updated:
+            # bulk_create/bulk_update bypass the per-row rollup signals
+            rebuild_inquiry_rollups()
+        for line, reason in rejected[:options["show_rejected"]]:
+            self.stdout.write(self.style.WARNING(f"line {line}: {reason}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created + updated} leads ({created} new, {updated} updated), rejected {len(rejected)} "
+            f"in {perf_counter() - start:.1f}s; run detect_duplicate_inquiries to screen the new ones"
+        ))
@@ -0,0 +1,32 @@
+import os
+from time import perf_counter
+from django.core.management.base import BaseCommand, CommandError
+from base.inbound import ingest_mailbox
+
+
+class Command(BaseCommand):
+    help = "Stream customer replies from an mbox file or Maildir into inbound inquiry responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="mbox file or Maildir directory")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"'{path}' does not exist")
+
+        totals = [0, 0, 0, 0]
+        start = perf_counter()
+        for batch in ingest_mailbox(path, batch_size=options["batch_size"]):
+            totals = [t + n for t, n in zip(totals, batch)]
+            self.stdout.write(
+                f"{sum(totals)} messages read, {totals[0]} ingested "
+                f"({sum(totals) / (perf_counter() - start):.0f} msg/s)"
+            )
+
+        created, duplicates, unthreaded, failed = totals
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {created} replies; skipped {duplicates} already ingested, "
+            f"{unthreaded} with no matching inquiry and {failed} unreadable"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from base.llm import stub_server
+
+
+class Command(BaseCommand):
+    help = "Serve a local OpenAI-compatible stub for the AI assistant (tests and benchmarks)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--delay", type=float, default=0.2, help="Seconds to wait before answering")
+        parser.add_argument("--fail", action="store_true", help="Answer every request with 503")
+
+    def handle(self, *args, **options):
+        server = stub_server(options["host"], options["port"], delay=options["delay"], fail=options["fail"])
+        self.stdout.write(self.style.SUCCESS(
+            f"LLM stub listening; set LLM_BACKEND=base.llm.OpenAIChatBackend "
+            f"LLM_API_BASE=http://{options['host']}:{server.server_port}/v1"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
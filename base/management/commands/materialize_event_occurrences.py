@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from base.cache import bump_content_version
+from base.models import Event
+from base.recurrence import materialize
+
+
+class Command(BaseCommand):
+    help = "Store upcoming occurrences of recurring events (run daily to roll the window forward)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, help="Occurrences to store after now (default EVENT_OCCURRENCES_AHEAD)")
+        parser.add_argument("--rebuild", action="store_true", help="Drop the stored occurrences and store every series again from now")
+
+    def handle(self, *args, **options):
+        series = Event.objects.exclude(recurrence_frequency="").order_by("id")
+        added = 0
+        for event in series.iterator():
+            added += materialize(event, ahead=options["ahead"], rebuild=options["rebuild"])
+        if added:
+            bump_content_version("events")
+        self.stdout.write(self.style.SUCCESS(f"Stored {added} occurrences for {series.count()} recurring events"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from base.cache import bump_content_version
+from base.profiling import profile_templates, summarize
+
+
+class Command(BaseCommand):
+    help = "Show per-include template render times for a page, with a cold and a warm fragment cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="/")
+        parser.add_argument("--runs", type=int, default=5)
+
+    def report(self, title, records, runs):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for label, calls, total in summarize(records):
+            self.stdout.write(f"  {total / runs:8.2f} ms  {calls // runs or calls:>3}x  {label}")
+
+    @override_settings(ALLOWED_HOSTS=["*"])
+    def handle(self, *args, **options):
+        client, path, runs = Client(), options["path"], options["runs"]
+
+        cold = []
+        for _ in range(runs):
+            bump_content_version("site")
+            with profile_templates() as records:
+                client.get(path)
+            cold += records
+        self.report(f"{path} - cold fragment cache", cold, runs)
+
+        warm = []
+        for _ in range(runs):
+            with profile_templates() as records:
+                client.get(path)
+            warm += records
+        self.report(f"{path} - warm fragment cache", warm, runs)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from base.analytics import rebuild_inquiry_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily inquiry rollup table from the Inquiry table, keeping the archived counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--from-archive", action="store_true",
+            help="Recount archived inquiries from the files under INQUIRY_ARCHIVE_ROOT (must exist here)")
+
+    def handle(self, *args, **options):
+        try:
+            buckets = rebuild_inquiry_rollups(batch_size=options["batch_size"], from_archive=options["from_archive"])
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} inquiry rollup buckets"))
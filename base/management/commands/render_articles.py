@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from base.models import Article
+
+RENDERED_FIELDS = ["content_html", "auto_excerpt", "toc", "word_count", "reading_time"]
+
+
+class Command(BaseCommand):
+    help = "Re-render the stored HTML, excerpt, TOC and reading time of every article"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size, batch, total = options["batch_size"], [], 0
+        for article in Article.objects.only("id", "content").iterator(chunk_size=batch_size):
+            article.render_content()
+            batch.append(article)
+            if len(batch) >= batch_size:
+                total += Article.objects.bulk_update(batch, RENDERED_FIELDS)
+                batch = []
+        if batch:
+            total += Article.objects.bulk_update(batch, RENDERED_FIELDS)
+        self.stdout.write(self.style.SUCCESS(f"Re-rendered {total} articles"))
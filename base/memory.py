@@ -0,0 +1,96 @@
+import json
+import re
+import uuid
+from collections import deque
+from django.conf import settings
+from django.core.cache import caches
+
+CONVERSATION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+MAX_ENTITIES = 6
+
+ORDINALS = {
+    "first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+    "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "sixth": 5, "6th": 5, "last": -1,
+}
+_ORDINAL = "(" + "|".join(ORDINALS) + ")"
+# "the second", "second one", "#2" / "number 2"; a bare "first" is too common to count
+ORDINAL_RE = re.compile(
+    r"\bthe\s+" + _ORDINAL + r"\b|\b" + _ORDINAL + r"\s+(?:one|item|option|result)\b|(?:#|\bnumber\s+)([1-9])\b"
+)
+PRONOUN_RE = re.compile(
+    r"\b(?:tell me more|more (?:about|on) (?:it|that|this|that one|this one)|more details?"
+    r"|elaborate|expand on (?:it|that|this)|what about (?:it|that|this))\b"
+)
+
+
+# --------------------- Conversation Memory ---------------------
+class ConversationMemory:
+    """
+    Bounded state for one assistant conversation: a ring buffer of the last
+    ASSISTANT_MEMORY_TURNS user messages and the entities (services, case
+    studies, articles) most recently shown, so follow-ups such as "tell me
+    more about the second one" can be resolved.
+
+    State lives only in the ASSISTANT_MEMORY_CACHE backend (the shared one,
+    so a follow-up served by another instance still finds it), expires after
+    ASSISTANT_MEMORY_TTL seconds without activity and is trimmed to
+    ASSISTANT_MEMORY_MAX_BYTES when saved.
+    """
+
+    def __init__(self, conversation_id=None):
+        self.cache = caches[settings.ASSISTANT_MEMORY_CACHE]
+        self.turns = deque(maxlen=settings.ASSISTANT_MEMORY_TURNS)
+        self.entities = []
+        self.focus = None
+
+        if isinstance(conversation_id, str) and CONVERSATION_ID_RE.match(conversation_id):
+            self.id = conversation_id
+            state = self.cache.get(self.key) or {}
+            self.turns.extend(state.get("turns", []))
+            self.entities = state.get("entities", [])
+            self.focus = state.get("focus")
+        else:
+            self.id = uuid.uuid4().hex
+
+    @property
+    def key(self):
+        return f"assistant-memory:{self.id}"
+
+    def add_turn(self, message: str):
+        self.turns.append(message[:200])
+
+    def show(self, entities):
+        """Remember the entities just listed to the user, in display order."""
+        self.entities = list(entities)[:MAX_ENTITIES]
+        self.focus = self.entities[0] if len(self.entities) == 1 else None
+
+    def resolve(self, message: str):
+        """Return the entity a follow-up message refers to, or None."""
+        if not self.entities and not self.focus:
+            return None
+        text = message.lower()
+
+        match = ORDINAL_RE.search(text)
+        if match and self.entities:
+            word = match.group(1) or match.group(2)
+            position = ORDINALS[word] if word else int(match.group(3)) - 1
+            if -1 <= position < len(self.entities):
+                return self.entities[position]
+
+        for entity in self.entities:
+            if entity["title"].lower() in text:
+                return entity
+
+        if PRONOUN_RE.search(text):
+            return self.focus
+        return None
+
+    def save(self):
+        state = {"turns": list(self.turns), "entities": self.entities, "focus": self.focus}
+        # Drop the oldest turns, then trailing entities, until the state fits the cap
+        while len(json.dumps(state)) > settings.ASSISTANT_MEMORY_MAX_BYTES and (state["turns"] or state["entities"]):
+            if state["turns"]:
+                state["turns"].pop(0)
+            else:
+                state["entities"].pop()
+        self.cache.set(self.key, state, settings.ASSISTANT_MEMORY_TTL)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_cache_control
+
+
+# --------------------- Public Page Fast Path ---------------------
+class PublicPageMiddleware:
+    """
+    Serve public content pages (settings.PUBLIC_PAGE_URL_NAMES) as if every
+    visitor were anonymous.
+
+    Must sit before SessionMiddleware. For GET/HEAD requests to those routes
+    the view gets AnonymousUser, so the (lazy) session is never loaded and no
+    session row is read, even for visitors who carry a session cookie.
+    Responses that set no cookies are marked public and lose `Vary: Cookie`,
+    which makes them cacheable by a CDN.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(request, "_public_page", False) and response.status_code == 200 and not response.cookies:
+            vary = [v.strip() for v in response.get("Vary", "").split(",") if v.strip()]
+            vary = [v for v in vary if v.lower() != "cookie"]
+            if vary:
+                response["Vary"] = ", ".join(vary)
+            elif response.has_header("Vary"):
+                del response["Vary"]
+            if not response.has_header("Cache-Control"):
+                patch_cache_control(
+                    response, public=True,
+                    max_age=settings.PUBLIC_PAGE_MAX_AGE,
+                    s_maxage=settings.PUBLIC_PAGE_S_MAXAGE,
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if request.method in ("GET", "HEAD") and match and match.url_name in settings.PUBLIC_PAGE_URL_NAMES:
+            request._public_page = True
+            request.user = AnonymousUser()
@@ -2,8 +2,15 @@
 from django.db import models
 from django.db.models import Q, F
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.utils import timezone
+from django.utils.functional import cached_property
+from datetime import timedelta
 from .utils import generate_slug
+from .rendering import render_article
+from .geo import geocode
+from .recurrence import describe, expand, rule_of
 from django.urls import reverse
 
 User = get_user_model()
@@ -41,6 +48,12 @@ class Direction(models.TextChoices):
     OUTBOUND = "outbound", "Outbound"
 
 
+class RecurrenceFrequency(models.TextChoices):
+    DAILY = "daily", "Daily"
+    WEEKLY = "weekly", "Weekly"
+    MONTHLY = "monthly", "Monthly"
+
+
 class ServiceStatus(models.TextChoices):
     ACTIVE = "active", "Active"
     INACTIVE = "inactive", "Inactive"
@@ -56,6 +69,21 @@ class ServiceCategory(models.TextChoices):
     DATA_ANALYTICS = "data_analytics", "Advanced Data Analytics"
 
 
+# ---------- Published content ----------
+class PublishedQuerySet(models.QuerySet):
+    """
+    `published()` applies the model's `published_filter()`; each content
+    model has a partial index whose condition that filter matches, so
+    public listings only read the published slice however many drafts,
+    archived rows or private events accumulate. The published/status
+    columns get no index of their own: the planner would prefer it to the
+    partial one and read the unpublished rows again.
+    """
+
+    def published(self):
+        return self.filter(self.model.published_filter())
+
+
 # ---------- Core tables ----------
 # software solution
 
@@ -65,17 +93,33 @@ class SoftwareSolution(TimeStampedModel):
     image = models.ImageField(
         upload_to="software_solutions/", blank=True, null=True)
     description = models.TextField(blank=True)  # describe the system
-    published_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    published_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, null=True, blank=True,
                                    on_delete=models.SET_NULL, related_name="solutions")
 
+    objects = PublishedQuerySet.as_manager()
+
     class Meta:
-        indexes = [models.Index(fields=["slug"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            models.Index(
+                fields=["-published_at", "-created_at"], include=["slug", "title", "updated_at"],
+                condition=Q(published_at__isnull=False), name="solution_published_idx",
+            ),
+        ]
         ordering = ["-published_at", "-created_at"]
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def published_filter():
+        return Q(published_at__lte=timezone.now())
+
+    @property
+    def is_published(self):
+        return self.published_at is not None and self.published_at <= timezone.now()
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = generate_slug(self.title, SoftwareSolution)
@@ -92,7 +136,7 @@ class Service(TimeStampedModel):
         max_length=50, choices=ServiceCategory.choices, db_index=True
     )
     status = models.CharField(
-        max_length=20, choices=ServiceStatus.choices, default=ServiceStatus.ACTIVE, db_index=True
+        max_length=20, choices=ServiceStatus.choices, default=ServiceStatus.ACTIVE
     )
     icon = models.CharField(max_length=100, blank=True)  # For Remix icon class names
     image = models.ImageField(upload_to="services/", blank=True, null=True)
@@ -101,16 +145,31 @@ class Service(TimeStampedModel):
         User, null=True, blank=True, on_delete=models.SET_NULL, related_name="services"
     )
 
+    objects = PublishedQuerySet.as_manager()
+
     class Meta:
         indexes = [
-            models.Index(fields=["status"]),
             models.Index(fields=["category", "status"]),
+            models.Index(
+                fields=["title"], include=["slug", "category", "icon"],
+                condition=Q(status="active"), name="service_active_idx",
+            ),
+            # jsonb_path_ops: serves `features__contains=[...]` (@>) lookups from the catalog
+            GinIndex(fields=["features"], opclasses=["jsonb_path_ops"], name="service_features_gin"),
         ]
         ordering = ["title"]
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def published_filter():
+        return Q(status=ServiceStatus.ACTIVE)
+
+    @property
+    def is_published(self):
+        return self.status == ServiceStatus.ACTIVE
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = generate_slug(self.title, Service)
@@ -131,7 +190,7 @@ class CaseStudy(TimeStampedModel):
     client_job_title = models.CharField(max_length=255, blank=True)
 
     image = models.ImageField(upload_to="case_studies/", blank=True, null=True)
-    published_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    published_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, null=True, blank=True,
                                    on_delete=models.SET_NULL, related_name="case_studies")
 
@@ -139,13 +198,29 @@ class CaseStudy(TimeStampedModel):
     solutions = models.ManyToManyField(
         SoftwareSolution, blank=True, related_name="case_studies")
 
+    objects = PublishedQuerySet.as_manager()
+
     class Meta:
-        indexes = [models.Index(fields=["slug"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            models.Index(
+                fields=["-published_at", "-created_at"], include=["slug", "title", "updated_at"],
+                condition=Q(published_at__isnull=False), name="casestudy_published_idx",
+            ),
+        ]
         ordering = ["-published_at", "-created_at"]
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def published_filter():
+        return Q(published_at__lte=timezone.now())
+
+    @property
+    def is_published(self):
+        return self.published_at is not None and self.published_at <= timezone.now()
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = generate_slug(self.title, CaseStudy)
@@ -159,27 +234,71 @@ class Article(TimeStampedModel):
     content = models.TextField()
     excerpt = models.TextField(blank=True)
     status = models.CharField(
-        max_length=16, choices=ArticleStatus.choices, default=ArticleStatus.DRAFT, db_index=True
+        max_length=16, choices=ArticleStatus.choices, default=ArticleStatus.DRAFT
     )
     image = models.ImageField(upload_to="articles/", blank=True, null=True)
-    published_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    published_at = models.DateTimeField(null=True, blank=True)
     author = models.ForeignKey(
         User, null=True, blank=True, on_delete=models.SET_NULL, related_name="articles"
     )
 
+    # Precomputed from `content` on save (see base/rendering.py)
+    content_html = models.TextField(blank=True, editable=False)
+    auto_excerpt = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    # Columns needed to render an article card; listings never load `content`
+    LISTING_FIELDS = (
+        "title", "slug", "excerpt", "auto_excerpt", "image", "status",
+        "published_at", "created_at", "reading_time", "author__username",
+    )
+
+    objects = PublishedQuerySet.as_manager()
+
     class Meta:
         indexes = [
-            models.Index(fields=["status", "-published_at"]),
+            models.Index(
+                fields=["-published_at", "-created_at"], include=["slug", "title", "updated_at"],
+                condition=Q(status="published"), name="article_published_idx",
+            ),
         ]
         ordering = ["-published_at", "-created_at"]
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def published_filter():
+        return Q(status=ArticleStatus.PUBLISHED)
+
+    @property
+    def is_published(self):
+        return self.status == ArticleStatus.PUBLISHED
+
+    @property
+    def display_excerpt(self):
+        return self.excerpt or self.auto_excerpt
+
+    def render_content(self):
+        rendered = render_article(self.content)
+        self.content_html = rendered["html"]
+        self.auto_excerpt = rendered["excerpt"]
+        self.toc = rendered["toc"]
+        self.word_count = rendered["word_count"]
+        self.reading_time = rendered["reading_time"]
+
     def save(self, *args, **kwargs):
         # Auto-slug if empty
         if not self.slug:
             self.slug = generate_slug(self.title, Article)
+        if "content" not in self.get_deferred_fields():
+            self.render_content()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "content" in update_fields:
+                kwargs["update_fields"] = {
+                    *update_fields, "content_html", "auto_excerpt", "toc", "word_count", "reading_time"}
         super().save(*args, **kwargs)
 
 # event
@@ -191,30 +310,173 @@ class Event(TimeStampedModel):
     starts_at = models.DateTimeField()
     ends_at = models.DateTimeField(null=True, blank=True)
     location = models.CharField(max_length=255, blank=True)
-    is_public = models.BooleanField(default=True, db_index=True)
+    # Filled from `location` by the offline geocoder (base/geo.py) when left empty
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    is_public = models.BooleanField(default=True)
     created_by = models.ForeignKey(
         User, null=True, blank=True, on_delete=models.SET_NULL, related_name="events")
 
+    # Recurrence rule; occurrences are expanded by base/recurrence.py, with
+    # `starts_at`/`ends_at` giving the first one and the duration of each
+    recurrence_frequency = models.CharField(
+        max_length=16, choices=RecurrenceFrequency.choices, blank=True,
+        help_text="Leave empty for a one-off event")
+    recurrence_interval = models.PositiveSmallIntegerField(
+        default=1, help_text="Repeat every N days/weeks/months")
+    recurrence_until = models.DateTimeField(null=True, blank=True, help_text="Last possible start")
+    recurrence_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of occurrences")
+    # Occurrences starting in [occurrences_from, occurrences_until] are stored in EventOccurrence
+    occurrences_from = models.DateTimeField(null=True, blank=True, editable=False)
+    occurrences_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PublishedQuerySet.as_manager()
+
     class Meta:
         indexes = [
-            models.Index(fields=["is_public", "starts_at"]),
+            models.Index(
+                fields=["starts_at", "id"],
+                include=["slug", "title", "ends_at", "location", "updated_at", "recurrence_frequency"],
+                condition=Q(is_public=True), name="event_public_idx",
+            ),
+            models.Index(
+                fields=["latitude", "longitude"],
+                condition=Q(is_public=True, latitude__isnull=False), name="event_public_geo_idx",
+            ),
         ]
         constraints = [
             models.CheckConstraint(
                 name="event_ends_after_start",
                 check=Q(ends_at__isnull=True) | Q(ends_at__gte=F("starts_at")),
-            )
+            ),
+            models.CheckConstraint(name="event_recurrence_interval_positive", check=Q(recurrence_interval__gte=1)),
         ]
         ordering = ["starts_at", "id"]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = generate_slug(self.title, Event)
+        if self.location and (self.latitude is None or self.longitude is None):
+            self.latitude, self.longitude = geocode(self.location) or (None, None)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def published_filter():
+        return Q(is_public=True)
+
+    @property
+    def is_published(self):
+        return self.is_public
+
+    @property
+    def is_recurring(self):
+        return bool(self.recurrence_frequency)
+
+    @property
+    def recurrence_label(self):
+        return describe(rule_of(self))
+
+    def occurrences(self, start=None, end=None):
+        """Lazily yield (starts_at, ends_at) for the occurrences starting in [start, end)."""
+        return expand(rule_of(self), start, end)
+
+    @cached_property
+    def next_occurrence(self):
+        """The first occurrence that has not ended yet, else the last one (for display)."""
+        if not self.is_recurring:
+            return self.starts_at, self.ends_at
+        now = timezone.now()
+        # An occurrence that started within its duration is still running
+        duration = self.ends_at - self.starts_at if self.ends_at else timedelta(0)
+        upcoming = next(self.occurrences(now - duration), None)
+        if upcoming is None and self.occurrences_until:
+            upcoming = (self.occurrences_until,
+                        self.occurrences_until + duration if self.ends_at else None)
+        return upcoming or (self.starts_at, self.ends_at)
+
+    @property
+    def display_starts_at(self):
+        return self.next_occurrence[0]
+
+    @property
+    def display_ends_at(self):
+        return self.next_occurrence[1]
+
+
+class EventOccurrence(models.Model):
+    """
+    Materialised occurrence of a recurring Event (see recurrence.materialize),
+    so calendar range queries read only the occurrences in range.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="occurrence_set")
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["starts_at", "event"], name="event_occurrence_start_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["event", "starts_at"], name="event_occurrence_unique_start"),
+        ]
+        ordering = ["starts_at", "event"]
+
+    def __str__(self):
+        return f"{self.event_id} @ {self.starts_at:%Y-%m-%d %H:%M}"
+
+
+class RelatedContent(models.Model):
+    """
+    Precomputed top-k TF-IDF neighbours of a content item (see base/related.py).
+    Title, URL and summary of the neighbour are copied in so a detail page
+    renders its related block from one index lookup.
+    """
+    source_type = models.CharField(max_length=16)
+    source_id = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    target_type = models.CharField(max_length=16)
+    target_id = models.PositiveIntegerField()
+    score = models.FloatField()
+    title = models.CharField(max_length=255)
+    url = models.CharField(max_length=255)
+    summary = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source_type", "source_id", "rank"], name="related_content_source_rank"),
+        ]
+        indexes = [
+            models.Index(fields=["target_type", "target_id"], name="related_content_target_idx"),
+        ]
+        ordering = ["source_type", "source_id", "rank"]
+
+    def __str__(self):
+        return f"{self.source_type}:{self.source_id} -> {self.target_type}:{self.target_id}"
+
+
+class SurrogateKeyUrl(models.Model):
+    """
+    A URL whose cacheable response carried a surrogate key (see
+    base/surrogate.py); purges resolve changed keys to URLs through it.
+    """
+    key = models.CharField(max_length=64)
+    url = models.CharField(max_length=500)
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key", "url"], name="surrogate_key_url"),
+        ]
+        indexes = [
+            models.Index(fields=["key", "-recorded_at"], name="surrogate_key_recent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.url}"
+
 
 # event gallery image
 class EventGalleryImage(TimeStampedModel):
@@ -227,11 +489,14 @@ class EventGalleryImage(TimeStampedModel):
     image = models.ImageField(upload_to="event_gallery/")
     caption = models.CharField(max_length=255, blank=True)
     order = models.PositiveIntegerField(default=0, help_text="Display order (lower numbers appear first)")
+    # SHA-256 of the uploaded file, used to skip duplicates on bulk import
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "created_at"]
         indexes = [
             models.Index(fields=["event", "order"]),
+            models.Index(fields=["event", "content_hash"]),
         ]
 
     def __str__(self):
@@ -251,10 +516,21 @@ class Inquiry(TimeStampedModel):
         max_length=16, choices=InquiryStatus.choices, default=InquiryStatus.NEW, db_index=True
     )
 
+    # Near-duplicate detection (see base/dedupe.py)
+    duplicate_of = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="near_duplicates",
+        help_text="Earlier inquiry with near-identical text",
+    )
+    similarity = models.FloatField(null=True, blank=True, editable=False)
+    is_suspected_spam = models.BooleanField(default=False, db_index=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["status", "-created_at"]),
             models.Index(fields=["email"]),
+            # Case-insensitive prefix search (istartswith) for the admin autocomplete
+            models.Index(OpClass(Upper("name"), name="text_pattern_ops"), name="inquiry_name_prefix_idx"),
+            models.Index(OpClass(Upper("email"), name="text_pattern_ops"), name="inquiry_email_prefix_idx"),
         ]
         ordering = ["-created_at", "-id"]
 
@@ -262,6 +538,24 @@ class Inquiry(TimeStampedModel):
         return f"{self.name} ({self.email})"
 
 
+class InquirySignature(models.Model):
+    """MinHash signature of an inquiry's text, used to score LSH candidates."""
+    inquiry = models.OneToOneField(
+        Inquiry, on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    minhash = models.BinaryField()
+
+
+class InquiryLshBucket(models.Model):
+    """One row per LSH band of an inquiry's signature; equal buckets mean candidate duplicates."""
+    inquiry = models.ForeignKey(Inquiry, on_delete=models.CASCADE, related_name="lsh_buckets")
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["bucket"]),
+        ]
+
+
 # inquiry response
 class InquiryResponse(models.Model):
     """
@@ -272,7 +566,7 @@ class InquiryResponse(models.Model):
     inquiry = models.ForeignKey(
         Inquiry, on_delete=models.CASCADE, related_name="responses")
     sender_type = models.CharField(max_length=16, choices=SenderType.choices)
-    admin = models.ForeignKey(User, null=True, blank=True,
+    admin = models.ForeignKey(User, null=True, blank=True, limit_choices_to={"is_staff": True},
                               on_delete=models.SET_NULL, related_name="inquiry_responses")
     recipient = models.CharField(
         max_length=255, blank=True)  # e.g., customer email
@@ -281,6 +575,8 @@ class InquiryResponse(models.Model):
     direction = models.CharField(
         max_length=16, choices=Direction.choices, default=Direction.OUTBOUND)
     sent_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Hash of the email Message-ID, for threading replies and skipping re-ingested mail
+    message_id_hash = models.CharField(max_length=32, blank=True, editable=False)
 
     class Meta:
         indexes = [
@@ -295,10 +591,44 @@ class InquiryResponse(models.Model):
                 name="inquiry_resp_admin_required_when_admin_sender",
                 check=Q(sender_type=SenderType.CUSTOMER) | (
                     Q(sender_type=SenderType.ADMIN) & Q(admin__isnull=False)),
-            )
+            ),
+            models.UniqueConstraint(
+                fields=["message_id_hash"], condition=~Q(message_id_hash=""),
+                name="inquiry_resp_unique_message_id",
+            ),
         ]
 
     def __str__(self):
         who = self.admin.get_username() if (self.admin and self.sender_type ==
                                             SenderType.ADMIN) else self.sender_type
         return f"Resp[{self.inquiry_id}] {who}: {self.subject or self.body[:30]}"
+
+
+# inquiry daily rollup
+class InquiryDailyRollup(models.Model):
+    """
+    Pre-aggregated inquiry counts per (day, status, country).
+    Maintained incrementally by the inquiry signals in base/signals.py and
+    rebuilt from scratch with `manage.py rebuild_inquiry_rollups`. Archived
+    inquiries (base/archive.py) stay in `count`; `archived` says how many of
+    them left the Inquiry table, so rebuilds keep them.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=16, choices=InquiryStatus.choices)
+    country = models.CharField(max_length=100, blank=True)
+    count = models.IntegerField(default=0)
+    archived = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status", "country"], name="inquiry_rollup_unique_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "day"]),
+            models.Index(fields=["country", "day"]),
+        ]
+        ordering = ["-day", "status", "country"]
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.country or '-'}: {self.count}"
@@ -0,0 +1,84 @@
+import io
+import os
+import logging
+import shutil
+import tempfile
+from django.conf import settings
+from django.http import FileResponse
+from .cache import bump_content_version, content_version
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Prebuilt Documents ---------------------
+def _version_root() -> str:
+    # Documents are filed under the shared "prebuilt" version, so an
+    # invalidation on any instance retires the copies on every instance
+    return os.path.join(str(settings.PREBUILT_ROOT), content_version("prebuilt"))
+
+
+def document_path(name: str) -> str:
+    return os.path.join(_version_root(), name)
+
+
+def _prune(current: str):
+    """Drop the documents of earlier versions."""
+    root = str(settings.PREBUILT_ROOT)
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if entry != current and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def get_or_build(name: str, builder) -> str:
+    """
+    Return the path of the prebuilt document `name`, calling
+    `builder(handle)` to write it first when it does not exist yet.
+    The file is written to a temporary name and moved into place, so
+    readers never see a half-written document. Raises OSError when
+    the document can't be stored.
+    """
+    path = document_path(name)
+    if os.path.exists(path):
+        return path
+
+    version_root = _version_root()
+    if not os.path.isdir(version_root):
+        os.makedirs(version_root, exist_ok=True)
+        _prune(os.path.basename(version_root))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            builder(handle)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def prebuilt_response(name: str, builder, content_type: str, persist=True):
+    """
+    Stream a prebuilt document, building it on first request. With
+    persist=False, or when it can't be stored (read-only filesystem),
+    the document is built in memory for this response only.
+    """
+    handle = None
+    if persist:
+        try:
+            handle = open(get_or_build(name, builder), "rb")
+        except OSError as e:
+            logger.warning(f"Could not store prebuilt document {name}: {e}")
+    if handle is None:
+        handle = io.BytesIO()
+        builder(handle)
+        handle.seek(0)
+    response = FileResponse(handle, content_type=content_type)
+    response["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
+def invalidate():
+    """Retire every prebuilt document; each is rebuilt on its next request."""
+    bump_content_version("prebuilt")
@@ -0,0 +1,96 @@
+import functools
+import contextvars
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.loader_tags import IncludeNode
+from django.templatetags.cache import CacheNode
+
+logger = logging.getLogger(__name__)
+
+_records = contextvars.ContextVar("template_profile", default=None)
+_installed = False
+
+
+# --------------------- Template Render Profiler ---------------------
+def _timed(render, label):
+    @functools.wraps(render)
+    def wrapper(node, context):
+        records = _records.get()
+        if records is None:
+            return render(node, context)
+        start = perf_counter()
+        try:
+            return render(node, context)
+        finally:
+            records.append((label(node, context), (perf_counter() - start) * 1000))
+    return wrapper
+
+
+def _include_label(node, context):
+    template = node.template.resolve(context)
+    return f"include {getattr(template, 'name', None) or template}"
+
+
+def _cache_label(node, context):
+    return f"cache {node.fragment_name}"
+
+
+def install():
+    """Wrap {% include %} and {% cache %} rendering with timers (idempotent)."""
+    global _installed
+    if not _installed:
+        IncludeNode.render = _timed(IncludeNode.render, _include_label)
+        CacheNode.render = _timed(CacheNode.render, _cache_label)
+        _installed = True
+
+
+@contextmanager
+def profile_templates():
+    """Collect (label, milliseconds) for every include/cache node rendered inside the block."""
+    install()
+    outer, records = _records.get(), []
+    token = _records.set(records)
+    try:
+        yield records
+    finally:
+        _records.reset(token)
+        if outer is not None:
+            outer.extend(records)
+
+
+def summarize(records):
+    """Aggregate records into [(label, calls, total ms)], slowest first."""
+    totals = {}
+    for label, ms in records:
+        calls, total = totals.get(label, (0, 0.0))
+        totals[label] = (calls + 1, total + ms)
+    return sorted(((label, c, t) for label, (c, t) in totals.items()), key=lambda r: -r[2])
+
+
+class TemplateProfilingMiddleware:
+    """
+    Adds a Server-Timing header with per-include render times, visible in
+    the browser's network panel. Enabled by settings.TEMPLATE_PROFILING.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_templates() as records:
+            response = self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+
+        timings = [
+            f'tpl{i};dur={total:.2f};desc="{label} x{calls}"'
+            for i, (label, calls, total) in enumerate(summarize(records)[:20])
+        ]
+        if timings:
+            response["Server-Timing"] = ", ".join(timings)
+        return response
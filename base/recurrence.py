@@ -0,0 +1,146 @@
+import calendar
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+DAYS_PER_STEP = {"daily": 1, "weekly": 7}
+RULE_FIELDS = ("starts_at", "ends_at", "recurrence_frequency", "recurrence_interval", "recurrence_count", "recurrence_until")
+_TICK = timedelta(microseconds=1)
+
+
+def rule_of(event) -> dict:
+    """The recurrence rule of an Event, as the mapping `expand` and `describe` take."""
+    return {name: getattr(event, name) for name in RULE_FIELDS}
+
+
+# --------------------- Expansion ---------------------
+def _wall_clock(value):
+    return timezone.localtime(value).replace(tzinfo=None)
+
+
+def _aware(value):
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def _add_months(value, months):
+    """`value` moved by whole months, or None when the day does not exist there (e.g. 31 April)."""
+    year, month = divmod(value.month - 1 + months, 12)
+    year, month = value.year + year, month + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+def _months_between(first, later):
+    return (later.year - first.year) * 12 + later.month - first.month
+
+
+def expand(rule, start=None, end=None):
+    """
+    Lazily yield (starts_at, ends_at) for each occurrence of a series
+    starting in [start, end); either bound may be None. `rule` is a mapping
+    with the Event fields in RULE_FIELDS (`rule_of(event)` or a .values()
+    row).
+
+    Occurrences keep the series' local wall-clock time and duration. The
+    first occurrence inside the window is computed arithmetically, so the
+    cost is the number of occurrences yielded, not the age of the series.
+    Monthly dates that do not exist (31 February) are skipped, as in
+    RFC 5545.
+    """
+    first = rule["starts_at"]
+    duration = rule["ends_at"] - first if rule["ends_at"] else None
+    frequency = rule["recurrence_frequency"]
+    interval = max(rule["recurrence_interval"] or 1, 1)
+    count, until = rule["recurrence_count"], rule["recurrence_until"]
+
+    if not frequency:
+        if (start is None or first >= start) and (end is None or first < end):
+            yield first, rule["ends_at"]
+        return
+
+    local = _wall_clock(first)
+    skip = 0
+    if start is not None and start > first:
+        if frequency in DAYS_PER_STEP:
+            step = DAYS_PER_STEP[frequency] * interval
+            skip = max((_wall_clock(start) - local).days // step - 1, 0)
+        elif count is None or local.day <= 28:
+            # With a count, months missing the day still use up no occurrence,
+            # so jumping ahead is only safe when every month has the day
+            skip = max(_months_between(local, _wall_clock(start)) // interval - 1, 0)
+
+    index = skip
+    produced = skip
+    while count is None or produced < count:
+        if frequency in DAYS_PER_STEP:
+            candidate = local + timedelta(days=DAYS_PER_STEP[frequency] * interval * index)
+        else:
+            candidate = _add_months(local, interval * index)
+        index += 1
+        if candidate is None:
+            continue
+        produced += 1
+        starts_at = _aware(candidate)
+        if (until is not None and starts_at > until) or (end is not None and starts_at >= end):
+            return
+        if start is None or starts_at >= start:
+            yield starts_at, starts_at + duration if duration is not None else None
+
+
+def describe(rule) -> str:
+    """Human-readable summary such as "Every 2 weeks" (empty for one-off events)."""
+    frequency = rule["recurrence_frequency"]
+    if not frequency:
+        return ""
+    unit = {"daily": "day", "weekly": "week", "monthly": "month"}[frequency]
+    interval = rule["recurrence_interval"] or 1
+    return f"Every {unit}" if interval == 1 else f"Every {interval} {unit}s"
+
+
+# --------------------- Materialisation ---------------------
+def materialize(event, ahead=None, rebuild=True):
+    """
+    Store the occurrences of a recurring event in EventOccurrence from now
+    up to the `ahead`-th upcoming one (default EVENT_OCCURRENCES_AHEAD),
+    and record the stored range in `occurrences_from`/`occurrences_until`.
+    Range queries read these rows through their starts_at index and expand
+    the series lazily outside that range (earlier windows, and beyond it).
+
+    With rebuild=False, existing rows are kept and only newer occurrences are
+    appended (rolling the window forward). Returns the number of rows added.
+    """
+    from .models import Event, EventOccurrence
+
+    ahead = settings.EVENT_OCCURRENCES_AHEAD if ahead is None else ahead
+    now = timezone.now()
+    with transaction.atomic():
+        reset = rebuild or not event.recurrence_frequency or event.occurrences_until is None
+        if reset:
+            EventOccurrence.objects.filter(event=event).delete()
+            stored_from, after, upcoming = now, now, 0
+        else:
+            stored_from, after = event.occurrences_from, event.occurrences_until + _TICK
+            upcoming = EventOccurrence.objects.filter(event=event, starts_at__gte=now).count()
+
+        rows = []
+        if event.recurrence_frequency and upcoming < ahead:
+            for starts_at, ends_at in expand(rule_of(event), after):
+                rows.append(EventOccurrence(event=event, starts_at=starts_at, ends_at=ends_at))
+                if starts_at >= now:
+                    upcoming += 1
+                    if upcoming >= ahead:
+                        break
+        EventOccurrence.objects.bulk_create(rows, ignore_conflicts=True)
+
+        if rows:
+            until = rows[-1].starts_at
+        elif reset:
+            stored_from = until = None  # nothing left to store: expanded lazily throughout
+        else:
+            until = event.occurrences_until
+        if (stored_from, until) != (event.occurrences_from, event.occurrences_until):
+            event.occurrences_from, event.occurrences_until = stored_from, until
+            Event.objects.filter(pk=event.pk).update(occurrences_from=stored_from, occurrences_until=until)
+    return len(rows)
@@ -0,0 +1,328 @@
+import os
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from .retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAMES = ("article", "casestudy", "event", "service", "softwaresolution")
+BLOCK_ROWS = 512
+
+
+# --------------------- Documents ---------------------
+def item_key(instance) -> str:
+    return f"{instance._meta.model_name}:{instance.pk}"
+
+
+def related_document(instance):
+    """
+    Return (title, url, summary, text) for a content object, or None when it
+    should not be recommended (unpublished, deleted, unsupported model).
+    """
+    from .models import Article, CaseStudy, Event, Service, SoftwareSolution
+
+    if instance._meta.model_name not in MODEL_NAMES or not instance.is_published:
+        return None
+    if isinstance(instance, Article):
+        url = reverse("articles_details", args=[instance.slug])
+        summary, parts = instance.excerpt, [instance.excerpt, strip_tags(instance.content_html or instance.content)]
+    elif isinstance(instance, CaseStudy):
+        url = reverse("case_studies_details", args=[instance.slug])
+        summary, parts = instance.summary, [instance.summary, instance.problem, instance.solution, instance.results]
+    elif isinstance(instance, Event):
+        url = reverse("events_details", args=[instance.slug])
+        summary, parts = instance.description, [instance.description, instance.location]
+    elif isinstance(instance, Service):
+        url = reverse("services")
+        features = instance.features if isinstance(instance.features, list) else []
+        summary = instance.short_description
+        parts = [instance.short_description, instance.description, ". ".join(map(str, features))]
+    elif isinstance(instance, SoftwareSolution):
+        url = reverse("case-study")
+        summary, parts = instance.description, [instance.description]
+    summary = Truncator(strip_tags(summary or "")).chars(200)
+    # The title is repeated so it weighs more than a single mention in the body
+    return instance.title, url, summary, "\n".join([instance.title, instance.title, *(p for p in parts if p)])
+
+
+def iter_related_documents():
+    from .models import Article, CaseStudy, Event, Service, SoftwareSolution
+
+    for model in (Article, CaseStudy, Event, Service, SoftwareSolution):
+        for instance in model.objects.published().iterator():
+            doc = related_document(instance)
+            if doc:
+                yield item_key(instance), doc
+
+
+# --------------------- Vectors ---------------------
+class RelatedIndex:
+    """
+    L2-normalised TF-IDF rows (items x terms, float32) over a vocabulary of
+    at most RELATED_MAX_FEATURES terms, so cosine similarity is a matrix
+    product. The vocabulary and IDF weights are fixed at build time;
+    replacing a single item re-weights only its row.
+    """
+
+    def __init__(self, keys, titles, urls, summaries, vocab, idf, vectors):
+        self.keys = np.asarray(keys, dtype=str)
+        self.titles = np.asarray(titles, dtype=str)
+        self.urls = np.asarray(urls, dtype=str)
+        self.summaries = np.asarray(summaries, dtype=str)
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(len(self.keys), len(self.vocab))
+        self.term_lookup = {term: i for i, term in enumerate(self.vocab.tolist())}
+        self.row_lookup = {key: i for i, key in enumerate(self.keys.tolist())}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, documents, max_features=None):
+        max_features = max_features or settings.RELATED_MAX_FEATURES
+        documents = list(documents)
+        counts = [Counter(tokenize(text)) for _, (_, _, _, text) in documents]
+        df = Counter(term for count in counts for term in count)
+        # Terms in a single document cannot link two items; keep the most widespread others
+        shared = [term for term, n in df.items() if n > 1]
+        vocab = sorted(sorted(shared, key=lambda t: (-df[t], t))[:max_features])
+        n = len(documents)
+        idf = np.log((1 + n) / (1 + np.asarray([df[t] for t in vocab], dtype=np.float32))) + 1
+
+        index = cls(
+            [key for key, _ in documents],
+            *zip(*((title, url, summary) for _, (title, url, summary, _) in documents)) if documents else ([], [], []),
+            vocab, idf, np.zeros((n, len(vocab)), dtype=np.float32),
+        )
+        for row, count in enumerate(counts):
+            index.vectors[row] = index.vectorize(count)
+        return index
+
+    def vectorize(self, counts) -> np.ndarray:
+        """Sublinear TF-IDF vector of a term Counter, L2-normalised."""
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        for term, tf in counts.items():
+            column = self.term_lookup.get(term)
+            if column is not None:
+                vector[column] = 1 + np.log(tf)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def replace(self, key, doc):
+        """Return a new index with `key` set to `doc` ((title, url, summary, text)) or removed when None."""
+        keep = self.keys != key
+        keys, titles, urls, summaries = self.keys[keep], self.titles[keep], self.urls[keep], self.summaries[keep]
+        vectors = self.vectors[keep]
+        if doc is not None:
+            title, url, summary, text = doc
+            keys, titles = np.append(keys, key), np.append(titles, title)
+            urls, summaries = np.append(urls, url), np.append(summaries, summary)
+            vectors = np.vstack([vectors, self.vectorize(Counter(tokenize(text)))[None, :]])
+        return RelatedIndex(keys, titles, urls, summaries, self.vocab, self.idf, vectors)
+
+    def neighbours(self, rows, k, min_score):
+        """
+        Yield (row, [(neighbour row, score), ...]) with the top `k` most
+        similar other items for each of `rows`, computed in blocks of
+        BLOCK_ROWS with one matrix product each.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            for row in rows:
+                yield int(row), []
+            return
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            scores = self.vectors[block] @ self.vectors.T
+            scores[np.arange(len(block)), block] = -1
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+            for row, ids, values in zip(block, top, top_scores):
+                yield int(row), [(int(i), float(s)) for i, s in zip(ids, values) if s >= min_score]
+
+    # ---- persistence ----
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path, keys=self.keys, titles=self.titles, urls=self.urls, summaries=self.summaries,
+            vocab=self.vocab, idf=self.idf, vectors=self.vectors.astype(np.float16),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[name] for name in ("keys", "titles", "urls", "summaries", "vocab", "idf", "vectors")))
+
+
+# --------------------- Index Store ---------------------
+_lock = threading.Lock()
+_cache = {"index": None, "mtime": None}
+
+
+def index_path() -> str:
+    return str(settings.RELATED_INDEX_PATH)
+
+
+def _write(index):
+    path = index_path()
+    try:
+        index.save(path)
+        _cache["mtime"] = os.path.getmtime(path)
+    except OSError as e:
+        # Read-only filesystems (e.g. serverless) keep the in-memory copy only
+        logger.warning(f"Could not write related-content index to {path}: {e}")
+        _cache["mtime"] = None
+    _cache["index"] = index
+
+
+def _current():
+    """The stored vectors (reloaded when another process rewrote the file), or None before a build. Caller holds _lock."""
+    path = index_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    index = _cache["index"]
+    if index is not None and (mtime is None or mtime == _cache["mtime"]):
+        return index
+    if mtime is None:
+        return None
+    _cache["index"] = RelatedIndex.load(path)
+    _cache["mtime"] = mtime
+    return _cache["index"]
+
+
+def get_index():
+    """Return the stored vectors, or None when no index has been built yet."""
+    with _lock:
+        return _current()
+
+
+# --------------------- Neighbour Table ---------------------
+def _rows_for(index, neighbours):
+    from .models import RelatedContent
+
+    rows = []
+    for row, items in neighbours:
+        source_type, source_id = index.keys[row].split(":")
+        for rank, (other, score) in enumerate(items):
+            target_type, target_id = index.keys[other].split(":")
+            rows.append(RelatedContent(
+                source_type=source_type, source_id=int(source_id), rank=rank,
+                target_type=target_type, target_id=int(target_id), score=round(score, 4),
+                title=index.titles[other], url=index.urls[other], summary=index.summaries[other],
+            ))
+    return rows
+
+
+def rebuild():
+    """
+    Re-fit the TF-IDF vectors on all published content and rewrite the
+    whole neighbour table. Returns (items, rows).
+    """
+    with _lock:
+        return _rebuild()
+
+
+def _rebuild():
+    from .models import RelatedContent
+
+    index = RelatedIndex.build(iter_related_documents())
+    rows = _rows_for(index, index.neighbours(range(len(index)), settings.RELATED_TOP_K, settings.RELATED_MIN_SCORE))
+    with transaction.atomic():
+        RelatedContent.objects.all().delete()
+        RelatedContent.objects.bulk_create(rows, batch_size=1000)
+    _write(index)
+    return len(index), len(rows)
+
+
+def refresh(instance, deleted=False):
+    """
+    Update the neighbour table after one item changed, touching only the
+    affected sources: the item itself, the items listing it, and the items
+    it now scores high enough to enter. Returns the keys of the sources
+    whose rows were rewritten (other than the item itself).
+
+    The read-modify-write of the vectors runs under the index lock, so
+    concurrent saves in one process can't drop each other's changes. The
+    vectors are built at deploy time (build_related_content); with none
+    stored the save is skipped and the next full build picks it up.
+    """
+    with _lock:
+        index = _current()
+        if index is None:
+            logger.info(f"No related-content index at {index_path()}; not refreshing {item_key(instance)}")
+            return []
+        return _refresh(index, instance, deleted)
+
+
+def _refresh(index, instance, deleted):
+    from .models import RelatedContent
+
+    key = item_key(instance)
+    doc = None if deleted else related_document(instance)
+    if doc is None and key not in index.row_lookup:
+        return []
+    index = index.replace(key, doc)
+    source_type, source_id = instance._meta.model_name, instance.pk
+    k, min_score = settings.RELATED_TOP_K, settings.RELATED_MIN_SCORE
+
+    affected = set(
+        f"{t}:{i}" for t, i in RelatedContent.objects.filter(target_type=source_type, target_id=source_id)
+        .values_list("source_type", "source_id")
+    )
+    if doc is not None:
+        row = index.row_lookup[key]
+        scores = index.vectors @ index.vectors[row]
+        scores[row] = -1
+        # Sources whose weakest neighbour (or a free slot) the item now beats
+        weakest = {}
+        for t, i, score in RelatedContent.objects.filter(rank=k - 1).values_list("source_type", "source_id", "score"):
+            weakest[f"{t}:{i}"] = score
+        for other in np.flatnonzero(scores >= min_score):
+            other_key = index.keys[other]
+            if scores[other] > weakest.get(other_key, min_score - 1):
+                affected.add(other_key)
+        affected.add(key)
+
+    rows = [index.row_lookup[other] for other in affected if other in index.row_lookup]
+    stale = Q(source_type=source_type, source_id=source_id)
+    for other in affected:
+        other_type, other_id = other.split(":")
+        stale |= Q(source_type=other_type, source_id=int(other_id))
+    with transaction.atomic():
+        RelatedContent.objects.filter(stale).delete()
+        RelatedContent.objects.bulk_create(_rows_for(index, index.neighbours(rows, k, min_score)), batch_size=1000)
+    _write(index)
+    return sorted(affected - {key})
+
+
+def related_for(instance, limit=None):
+    """Precomputed related items for a detail page: one lookup on the (source_type, source_id, rank) index."""
+    from .models import RelatedContent
+
+    limit = limit or settings.RELATED_TOP_K
+    return list(
+        RelatedContent.objects.filter(
+            source_type=instance._meta.model_name, source_id=instance.pk, rank__lt=limit)
+        .order_by("rank")
+        .values("target_type", "title", "url", "summary")
+    )
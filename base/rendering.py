@@ -0,0 +1,65 @@
+import math
+import re
+from django.utils.html import escape
+from django.utils.text import Truncator, slugify
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+
+HEADING_RE = re.compile(r"^(#{1,3})\s+(.+?)\s*#*$")
+BULLET_RE = re.compile(r"^[-*•]\s+(.*)$")
+
+
+# --------------------- Article Rendering ---------------------
+def render_article(content: str) -> dict:
+    """
+    Render plain-text article content once, at save time.
+
+    Blank lines separate blocks; `#`/`##`/`###` lines become headings with
+    anchors (collected into the table of contents) and runs of `- ` lines
+    become lists. Every piece of text is escaped, so the stored HTML is
+    safe to output without further filtering.
+
+    Returns a dict with ``html``, ``toc``, ``excerpt``, ``word_count`` and
+    ``reading_time`` (minutes).
+    """
+    content = (content or "").replace("\r\n", "\n").strip()
+    html, toc, used_ids, paragraphs = [], [], set(), []
+
+    for block in re.split(r"\n\s*\n", content):
+        lines = [line.strip() for line in block.strip().split("\n") if line.strip()]
+        i = 0
+        while i < len(lines):
+            heading = HEADING_RE.match(lines[i])
+            if heading:
+                level, text = len(heading.group(1)) + 1, heading.group(2)
+                anchor = base = slugify(text) or "section"
+                n = 2
+                while anchor in used_ids:
+                    anchor, n = f"{base}-{n}", n + 1
+                used_ids.add(anchor)
+                toc.append({"level": level, "title": text, "anchor": anchor})
+                html.append(f'<h{level} id="{anchor}">{escape(text)}</h{level}>')
+                i += 1
+            elif BULLET_RE.match(lines[i]):
+                items = []
+                while i < len(lines) and BULLET_RE.match(lines[i]):
+                    items.append(f"<li>{escape(BULLET_RE.match(lines[i]).group(1))}</li>")
+                    i += 1
+                html.append(f"<ul>{''.join(items)}</ul>")
+            else:
+                start = i
+                while i < len(lines) and not HEADING_RE.match(lines[i]) and not BULLET_RE.match(lines[i]):
+                    i += 1
+                paragraph = lines[start:i]
+                paragraphs.append(" ".join(paragraph))
+                html.append(f"<p>{'<br>'.join(escape(line) for line in paragraph)}</p>")
+
+    word_count = len(content.split())
+    return {
+        "html": "\n".join(html),
+        "toc": toc,
+        "excerpt": Truncator(" ".join(paragraphs)).words(EXCERPT_WORDS),
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+    }
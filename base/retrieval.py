@@ -0,0 +1,333 @@
+import os
+import re
+import logging
+import threading
+import numpy as np
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+CHUNK_WORDS = 60
+SNIPPET_WORDS = 35
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about all also am an and any are as at be been but by can could did do does
+for from get had has have how i if in into is it its just me more my no not of
+on or our out so some than that the their them then there these they this to
+too us was we what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+# --------------------- Documents ---------------------
+def source_key(instance) -> str:
+    return f"{instance._meta.model_name}:{instance.pk}"
+
+
+def document_for(instance):
+    """
+    Return (title, url, text) for a content object, or None when the object
+    should not be searchable (drafts, inactive services, deleted rows).
+    """
+    from .models import Article, CaseStudy, Service
+
+    if not isinstance(instance, (Article, CaseStudy, Service)) or not instance.is_published:
+        return None
+    if isinstance(instance, Article):
+        url = reverse("articles_details", args=[instance.slug])
+        parts = [instance.excerpt, instance.content]
+    elif isinstance(instance, CaseStudy):
+        url = reverse("case_studies_details", args=[instance.slug])
+        parts = [instance.summary, instance.problem, instance.solution, instance.results]
+    else:
+        url = reverse("services")
+        features = instance.features if isinstance(instance.features, list) else []
+        parts = [instance.short_description, instance.description, ". ".join(map(str, features))]
+    return instance.title, url, "\n".join(p for p in parts if p)
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS) -> list:
+    words = text.split()
+    return [" ".join(words[i:i + size]) for i in range(0, len(words), size)] or [""]
+
+
+def iter_documents():
+    from .models import Article, CaseStudy, Service
+
+    querysets = (Article.objects.published(), CaseStudy.objects.published(), Service.objects.published())
+    for queryset in querysets:
+        for instance in queryset.iterator():
+            doc = document_for(instance)
+            if doc:
+                yield source_key(instance), doc
+
+
+# --------------------- Index ---------------------
+class RetrievalIndex:
+    """
+    BM25 index over content chunks.
+
+    Stored chunk-major (CSR: ``indptr``/``term_ids``/``term_freqs``) so a
+    single document can be replaced without touching the others; the
+    term-major postings used for scoring are derived in memory on load.
+    """
+
+    def __init__(self, vocab, indptr, term_ids, term_freqs, sources, titles, urls, texts):
+        self.vocab = list(vocab)
+        self.term_lookup = {term: i for i, term in enumerate(self.vocab)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.term_ids = np.asarray(term_ids, dtype=np.int32)
+        self.term_freqs = np.asarray(term_freqs, dtype=np.uint16)
+        self.sources = np.asarray(sources, dtype=str)
+        self.titles = np.asarray(titles, dtype=str)
+        self.urls = np.asarray(urls, dtype=str)
+        self.texts = np.asarray(texts, dtype=str)
+        self._build_postings()
+
+    @classmethod
+    def empty(cls):
+        return cls([], [0], [], [], [], [], [], [])
+
+    def __len__(self):
+        return len(self.sources)
+
+    def _build_postings(self):
+        n_chunks = len(self.sources)
+        chunk_of_entry = np.repeat(np.arange(n_chunks, dtype=np.int32), np.diff(self.indptr))
+        self.chunk_lengths = np.bincount(
+            chunk_of_entry, weights=self.term_freqs, minlength=n_chunks).astype(np.float32)
+        self.avg_length = float(self.chunk_lengths.mean()) if n_chunks else 0.0
+
+        order = np.argsort(self.term_ids, kind="stable")
+        self.post_chunks = chunk_of_entry[order]
+        self.post_freqs = self.term_freqs[order].astype(np.float32)
+
+        df = np.bincount(self.term_ids, minlength=len(self.vocab))
+        self.term_ptr = np.concatenate(([0], np.cumsum(df)))
+        self.idf = np.log1p((n_chunks - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    # ---- mutation ----
+    @staticmethod
+    def _encode(terms, term_lookup, vocab):
+        counts = {}
+        for term in terms:
+            term_id = term_lookup.get(term)
+            if term_id is None:
+                term_id = term_lookup[term] = len(vocab)
+                vocab.append(term)
+            counts[term_id] = counts.get(term_id, 0) + 1
+        ids = sorted(counts)
+        return ids, [min(counts[i], 65535) for i in ids]
+
+    def replace(self, documents, remove=()):
+        """
+        Return a new index with every chunk of the ``remove`` source keys
+        dropped and ``documents`` ((key, (title, url, text)) pairs) appended.
+        """
+        remove = set(remove) | {key for key, _ in documents}
+        keep = ~np.isin(self.sources, list(remove)) if remove and len(self) else np.ones(len(self), bool)
+
+        lengths = np.diff(self.indptr)[keep]
+        entry_mask = np.repeat(keep, np.diff(self.indptr))
+        vocab = list(self.vocab)
+        term_lookup = dict(self.term_lookup)
+
+        new_ids, new_freqs, new_lengths = [], [], []
+        sources, titles, urls, texts = [], [], [], []
+        for key, (title, url, text) in documents:
+            for chunk in chunk_text(text):
+                ids, freqs = self._encode(tokenize(f"{title} {chunk}"), term_lookup, vocab)
+                new_ids.extend(ids)
+                new_freqs.extend(freqs)
+                new_lengths.append(len(ids))
+                sources.append(key)
+                titles.append(title)
+                urls.append(url)
+                texts.append(chunk)
+
+        all_lengths = np.concatenate((lengths, np.asarray(new_lengths, dtype=np.int64)))
+        return RetrievalIndex(
+            vocab,
+            np.concatenate(([0], np.cumsum(all_lengths))),
+            np.concatenate((self.term_ids[entry_mask], np.asarray(new_ids, dtype=np.int32))),
+            np.concatenate((self.term_freqs[entry_mask], np.asarray(new_freqs, dtype=np.uint16))),
+            np.concatenate((self.sources[keep], np.asarray(sources, dtype=str))),
+            np.concatenate((self.titles[keep], np.asarray(titles, dtype=str))),
+            np.concatenate((self.urls[keep], np.asarray(urls, dtype=str))),
+            np.concatenate((self.texts[keep], np.asarray(texts, dtype=str))),
+        )
+
+    # ---- persistence ----
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vocab=np.asarray(self.vocab, dtype=str),
+            indptr=self.indptr,
+            term_ids=self.term_ids,
+            term_freqs=self.term_freqs,
+            sources=self.sources,
+            titles=self.titles,
+            urls=self.urls,
+            texts=self.texts,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[name] for name in (
+                "vocab", "indptr", "term_ids", "term_freqs", "sources", "titles", "urls", "texts")))
+
+    # ---- querying ----
+    def search(self, query: str, k: int = 3):
+        """
+        Return up to ``k`` hits (best chunk per document) as dicts with
+        ``source``, ``title``, ``url``, ``text``, ``score`` and ``coverage``
+        (share of distinct query terms the chunk contains).
+        """
+        query_terms = set(tokenize(query))
+        terms = [self.term_lookup[t] for t in query_terms if t in self.term_lookup]
+        if not terms or not len(self):
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        matched = np.zeros(len(self), dtype=np.int16)
+        norm = K1 * (1 - B + B * self.chunk_lengths / (self.avg_length or 1.0))
+        for term_id in terms:
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            chunks = self.post_chunks[start:end]
+            freqs = self.post_freqs[start:end]
+            scores[chunks] += self.idf[term_id] * freqs * (K1 + 1) / (freqs + norm[chunks])
+            matched[chunks] += 1
+
+        candidates = np.flatnonzero(scores)
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        hits, seen = [], set()
+        for i in candidates:
+            if self.sources[i] in seen:
+                continue
+            seen.add(self.sources[i])
+            hits.append({
+                "source": str(self.sources[i]),
+                "title": str(self.titles[i]),
+                "url": str(self.urls[i]),
+                "text": str(self.texts[i]),
+                "score": float(scores[i]),
+                "coverage": float(matched[i]) / len(query_terms),
+            })
+            if len(hits) == k:
+                break
+        return hits
+
+
+# --------------------- Index Store ---------------------
+_lock = threading.Lock()
+_cache = {"index": None, "mtime": None}
+
+
+def index_path() -> str:
+    return str(settings.RETRIEVAL_INDEX_PATH)
+
+
+def _write(index):
+    path = index_path()
+    try:
+        index.save(path)
+        _cache["mtime"] = os.path.getmtime(path)
+    except OSError as e:
+        # Read-only filesystems (e.g. serverless) keep the in-memory copy only
+        logger.warning(f"Could not write retrieval index to {path}: {e}")
+        _cache["mtime"] = None
+    _cache["index"] = index
+
+
+def build_index():
+    """Rebuild the whole index from the database and persist it (build_retrieval_index command)."""
+    index = RetrievalIndex.empty().replace(list(iter_documents()))
+    with _lock:
+        _write(index)
+    return index
+
+
+def _current():
+    """The stored index (reloaded when another process rewrote the file), or None when none was built."""
+    path = index_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    index = _cache["index"]
+    if index is not None and (mtime is None or mtime == _cache["mtime"]):
+        return index
+    if mtime is None:
+        return None
+    _cache["index"] = RetrievalIndex.load(path)
+    _cache["mtime"] = mtime
+    return _cache["index"]
+
+
+def get_index():
+    """
+    Return the current index, or None before it has been built. Requests
+    never build it: `manage.py build_retrieval_index` does, at deploy time
+    (build.sh / vercel.json).
+    """
+    with _lock:
+        return _current()
+
+
+def update_document(instance, deleted=False):
+    """
+    Replace the chunks of a single content object in the stored index.
+    Skipped when no index has been built: the next build_retrieval_index
+    picks the change up.
+    """
+    key = source_key(instance)
+    doc = None if deleted else document_for(instance)
+    # Read, modify and write under one lock so concurrent saves don't drop each other's changes
+    with _lock:
+        index = _current()
+        if index is None:
+            logger.info(f"No retrieval index at {index_path()}; not indexing {key}")
+            return
+        _write(index.replace([(key, doc)] if doc else [], remove=[key]))
+
+
+def search(query: str, k: int = None):
+    index = get_index()
+    return index.search(query, k or settings.RETRIEVAL_TOP_K) if index is not None else []
+
+
+def render_hits(hits) -> str:
+    """Render search hits as chatbot HTML with snippets and links."""
+    items = []
+    for hit in hits:
+        words = hit["text"].split()
+        snippet = " ".join(words[:SNIPPET_WORDS]) + ("…" if len(words) > SNIPPET_WORDS else "")
+        items.append(
+            f"<li><a href=\"{escape(hit['url'])}\" class=\"text-emerald-400 underline\">"
+            f"<strong>{escape(hit['title'])}</strong></a>: {escape(snippet)}</li>"
+        )
+    return f"""
+    <p>Here's what I found on our site:</p>
+    <ul class="list-disc list-inside mt-2 space-y-2">{"".join(items)}</ul>
+    <br/>
+    <p>Want to go deeper? <a href="/contact/" class="text-emerald-400 underline">Contact our team</a>.</p>
+    """
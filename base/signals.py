@@ -0,0 +1,266 @@
+import logging
+from django.contrib.admin.models import LogEntry
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+from .analytics import bump_inquiry_rollup, inquiry_rollup_key, rollup_signals_active
+from .cache import bump_content_version
+from .dedupe import index_inquiry, screen_inquiry
+from .live import publish
+from .models import Article, CaseStudy, Event, EventGalleryImage, Inquiry, InquiryResponse, Service, SoftwareSolution
+from .prebuilt import invalidate
+from .recurrence import RULE_FIELDS, materialize, rule_of
+from .related import refresh as refresh_related
+from .retrieval import update_document
+from .surrogate import purge, purge_keys, tag_instance
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = {"created_at", "status", "country"}
+
+
+# --------------------- Inquiry Rollups ---------------------
+@receiver(post_init, sender=Inquiry)
+def remember_inquiry_rollup_key(sender, instance, **kwargs):
+    """
+    Remember which bucket a loaded inquiry is counted in. Instances loaded
+    with .only()/.defer() on the rollup fields are left unknown rather than
+    triggering a query per row; `rebuild_inquiry_rollups` reconciles those.
+    """
+    if not instance.pk or ROLLUP_FIELDS & instance.get_deferred_fields():
+        instance._rollup_key = None
+    else:
+        instance._rollup_key = inquiry_rollup_key(instance)
+
+
+@receiver(post_save, sender=Inquiry)
+def update_inquiry_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    key = inquiry_rollup_key(instance)
+    previous = instance._rollup_key
+    if created:
+        bump_inquiry_rollup(key, 1)
+    elif previous is not None and previous != key:
+        bump_inquiry_rollup(previous, -1)
+        bump_inquiry_rollup(key, 1)
+    instance._rollup_key = key
+
+
+@receiver(post_delete, sender=Inquiry)
+def remove_inquiry_from_rollup(sender, instance, **kwargs):
+    if instance._rollup_key is not None and rollup_signals_active():
+        bump_inquiry_rollup(instance._rollup_key, -1)
+
+
+# --------------------- Live Admin Events ---------------------
+@receiver(post_save, sender=Inquiry)
+def announce_inquiry(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        publish({
+            "type": "inquiry",
+            "id": instance.pk,
+            "name": instance.name,
+            "email": instance.email,
+            "company_name": instance.company_name,
+            "is_suspected_spam": instance.is_suspected_spam,
+            "created_at": instance.created_at,
+            "url": reverse("admin:base_inquiry_change", args=[instance.pk]),
+        })
+    except Exception as e:
+        logger.error(f"Could not announce inquiry {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=InquiryResponse)
+def announce_inquiry_response(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        publish({
+            "type": "response",
+            "id": instance.pk,
+            "inquiry_id": instance.inquiry_id,
+            "sender_type": instance.sender_type,
+            "direction": instance.direction,
+            "subject": instance.subject,
+            "sent_at": instance.sent_at,
+            "url": reverse("admin:base_inquiry_change", args=[instance.inquiry_id]),
+        })
+    except Exception as e:
+        logger.error(f"Could not announce response {instance.pk}: {e}")
+
+
+# --------------------- Near-duplicate Detection ---------------------
+@receiver(pre_save, sender=Inquiry)
+def screen_new_inquiry(sender, instance, raw=False, **kwargs):
+    """Flag new inquiries that nearly match an earlier one before they are stored."""
+    instance._minhash = None
+    if raw or not instance._state.adding:
+        return
+    try:
+        instance._minhash = screen_inquiry(instance)
+    except Exception as e:
+        logger.error(f"Near-duplicate check failed for inquiry from {instance.email}: {e}")
+
+
+@receiver(post_save, sender=Inquiry)
+def index_new_inquiry(sender, instance, created, raw=False, **kwargs):
+    if created and getattr(instance, "_minhash", None) is not None:
+        index_inquiry(instance.pk, *instance._minhash)
+        instance._minhash = None
+
+
+# --------------------- Retrieval Index ---------------------
+def _refresh_retrieval_index(instance, deleted=False):
+    try:
+        update_document(instance, deleted=deleted)
+    except Exception as e:
+        logger.error(f"Failed to update retrieval index for {instance!r}: {e}")
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=CaseStudy)
+@receiver(post_save, sender=Service)
+def index_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: _refresh_retrieval_index(instance))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CaseStudy)
+@receiver(post_delete, sender=Service)
+def unindex_content(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _refresh_retrieval_index(instance, deleted=True))
+
+
+# --------------------- Related Content ---------------------
+def _refresh_related_content(instance, deleted=False):
+    try:
+        affected = refresh_related(instance, deleted=deleted)
+    except Exception as e:
+        logger.error(f"Failed to refresh related content for {instance!r}: {e}")
+        return
+    # Pages listing the item in their related block show its old title/summary
+    if affected:
+        purge(affected)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=CaseStudy)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=SoftwareSolution)
+def refresh_related_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: _refresh_related_content(instance))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CaseStudy)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=SoftwareSolution)
+def remove_related_content(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _refresh_related_content(instance, deleted=True))
+
+
+# --------------------- Recurring Events ---------------------
+@receiver(post_init, sender=Event)
+def remember_recurrence_rule(sender, instance, **kwargs):
+    """Remember the loaded rule; deferred rule fields leave it unknown (treated as changed)."""
+    if not instance.pk or set(RULE_FIELDS) & instance.get_deferred_fields():
+        instance._stored_rule = None
+    else:
+        instance._stored_rule = rule_of(instance)
+
+
+@receiver(post_save, sender=Event)
+def materialize_occurrences(sender, instance, raw=False, **kwargs):
+    """Re-store the occurrences of a series whose rule changed (and drop them when it becomes one-off)."""
+    if raw:
+        return
+    rule = rule_of(instance)
+    if rule != instance._stored_rule and (instance.recurrence_frequency or instance.occurrences_until):
+        materialize(instance)
+    instance._stored_rule = rule
+
+
+# --------------------- Content Versions ---------------------
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def bump_events_version(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: bump_content_version("events"))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_services_version(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: bump_content_version("services"))
+
+
+@receiver(post_save, sender=LogEntry)
+def bump_site_version(sender, raw=False, **kwargs):
+    """
+    Every admin add/change/delete writes a LogEntry; expire the layout
+    fragments once the change is committed, so no process caches the old
+    content under the new version.
+    """
+    if not raw:
+        transaction.on_commit(lambda: bump_content_version("site"))
+
+
+# --------------------- Sitemaps & Feeds ---------------------
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=CaseStudy)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=SoftwareSolution)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CaseStudy)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=SoftwareSolution)
+def invalidate_prebuilt_documents(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(invalidate)
+
+
+# --------------------- Surrogate Keys ---------------------
+@receiver(post_init, sender=Article)
+@receiver(post_init, sender=CaseStudy)
+@receiver(post_init, sender=Event)
+@receiver(post_init, sender=EventGalleryImage)
+@receiver(post_init, sender=Service)
+@receiver(post_init, sender=SoftwareSolution)
+def tag_rendered_object(sender, instance, **kwargs):
+    tag_instance(instance)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=CaseStudy)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=SoftwareSolution)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CaseStudy)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=SoftwareSolution)
+def purge_content_urls(sender, instance, raw=False, **kwargs):
+    if not raw:
+        keys = purge_keys(instance)
+        transaction.on_commit(lambda: purge(keys))
+
+
+@receiver(post_save, sender=EventGalleryImage)
+@receiver(post_delete, sender=EventGalleryImage)
+def purge_gallery_urls(sender, instance, raw=False, **kwargs):
+    if not raw:
+        keys = [f"event:{instance.event_id}"]
+        transaction.on_commit(lambda: purge(keys))
@@ -0,0 +1,62 @@
+// Live inquiry notifications for the admin (server-sent events from /live/inquiries/)
+// Shows a banner instead of re-running the changelist query on a timer.
+document.addEventListener("DOMContentLoaded", function () {
+  if (!window.EventSource) return;
+
+  const changeMatch = window.location.pathname.match(/\/base\/inquiry\/(\d+)\/change\/$/);
+  const onChangelist = /\/base\/inquiry\/$/.test(window.location.pathname);
+  if (!changeMatch && !onChangelist) return;
+
+  const banner = document.createElement("div");
+  banner.style.cssText =
+    "display:none;position:fixed;top:12px;right:12px;z-index:1000;padding:10px 16px;" +
+    "background:#10b981;color:#fff;border-radius:4px;cursor:pointer;box-shadow:0 2px 6px rgba(0,0,0,.2)";
+  banner.title = "Reload to show";
+  banner.addEventListener("click", function () {
+    window.location.reload();
+  });
+  document.body.appendChild(banner);
+
+  let newInquiries = 0;
+  let newReplies = 0;
+
+  function render() {
+    const parts = [];
+    if (newInquiries) parts.push(newInquiries + " new inquir" + (newInquiries === 1 ? "y" : "ies"));
+    if (newReplies) parts.push(newReplies + " new repl" + (newReplies === 1 ? "y" : "ies"));
+    banner.textContent = parts.join(", ") + " (click to reload)";
+    banner.style.display = parts.length ? "block" : "none";
+  }
+
+  const source = new EventSource("/live/inquiries/");
+  source.addEventListener("inquiry", function () {
+    if (onChangelist) {
+      newInquiries += 1;
+      render();
+    }
+  });
+  source.addEventListener("response", function (message) {
+    const event = JSON.parse(message.data);
+    if (onChangelist || (changeMatch && String(event.inquiry_id) === changeMatch[1])) {
+      newReplies += 1;
+      render();
+    }
+  });
+  // Bulk imports (leads, mailbox ingestion) send one event per batch
+  source.addEventListener("inquiries", function (message) {
+    if (onChangelist) {
+      newInquiries += JSON.parse(message.data).count;
+      render();
+    }
+  });
+  source.addEventListener("responses", function (message) {
+    const event = JSON.parse(message.data);
+    if (onChangelist) {
+      newReplies += event.count;
+      render();
+    } else if (changeMatch && event.inquiry_ids.map(String).indexOf(changeMatch[1]) !== -1) {
+      newReplies += 1;
+      render();
+    }
+  });
+});
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+from .assets import (
+    RASTER_EXTENSIONS, critical_name, critical_template_html, extract_critical_css,
+    image_variants, minify_css, minify_js, variant_name,
+)
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise manifest storage with an extra collectstatic stage for the
+    site's own assets (STATIC_OPTIMIZE_PREFIXES): CSS/JS are minified,
+    PNG/JPEG get WebP/AVIF siblings and stylesheets get a `.critical.css`
+    subset for inlining. Everything produced here is then hashed and
+    compressed by the parent class like any other static file.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in list(paths):
+                if name.startswith(tuple(settings.STATIC_OPTIMIZE_PREFIXES)):
+                    self.optimize(name, paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _replace(self, name, content, paths):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+        paths[name] = (self, name)
+
+    def optimize(self, name, paths):
+        source_storage, source_path = paths[name]
+        with source_storage.open(source_path) as handle:
+            data = handle.read()
+
+        lower = name.lower()
+        if lower.endswith(".css"):
+            css = data.decode("utf-8")
+            self._replace(name, minify_css(css).encode("utf-8"), paths)
+            critical = extract_critical_css(css, critical_template_html())
+            self._replace(critical_name(name), critical.encode("utf-8"), paths)
+        elif lower.endswith(".js"):
+            self._replace(name, minify_js(data.decode("utf-8")).encode("utf-8"), paths)
+        elif lower.endswith(RASTER_EXTENSIONS):
+            for ext, variant in image_variants(data):
+                self._replace(variant_name(name, ext), variant, paths)
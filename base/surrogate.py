@@ -0,0 +1,170 @@
+import contextvars
+import hashlib
+import logging
+from datetime import timedelta
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .feeds import STATIC_PAGES
+
+logger = logging.getLogger(__name__)
+
+_keys = contextvars.ContextVar("surrogate_keys", default=None)
+
+# Routes whose output depends on every row of a model (new rows appear on them),
+# beyond the individual objects they happen to render
+COLLECTION_ROUTES = {
+    **STATIC_PAGES,
+    "articles_feed": ("article",),
+    "sitemap": ("article", "casestudy", "event", "service", "softwaresolution"),
+    "events_feed_json": ("event",),
+    "events_feed_ics": ("event",),
+    "events_nearby": ("event",),
+    "services_catalog": ("service",),
+}
+
+
+# --------------------- Tagging ---------------------
+def object_key(instance) -> str:
+    return f"{instance._meta.model_name}:{instance.pk}"
+
+
+def tag(*keys):
+    """Record surrogate keys for the response being rendered (no-op outside a request)."""
+    collected = _keys.get()
+    if collected is not None:
+        collected.update(keys)
+
+
+def tag_instance(instance):
+    if instance.pk is not None and _keys.get() is not None:
+        tag(object_key(instance))
+
+
+# --------------------- Inverted Index ---------------------
+def canonical_url(request) -> str:
+    """
+    The URL recorded for a response: its path plus only the query
+    parameters in SURROGATE_URL_QUERY_PARAMS, so arbitrary query strings
+    can't multiply the index.
+    """
+    params = [(name, request.GET[name]) for name in sorted(settings.SURROGATE_URL_QUERY_PARAMS) if name in request.GET]
+    return f"{request.path}?{urlencode(params)}" if params else request.path
+
+
+def record(keys, url):
+    """
+    Add `url` to the URL set of each surrogate key: one INSERT ... ON
+    CONFLICT DO UPDATE, which is atomic across processes and refreshes
+    the pair's recorded_at. A process skips pairs it wrote within the
+    last SURROGATE_RECORD_INTERVAL seconds.
+    """
+    from .models import SurrogateKeyUrl
+
+    if len(url) > SurrogateKeyUrl._meta.get_field("url").max_length:
+        return
+    memo_key = f"surrogate-recorded:{hashlib.sha256(url.encode()).hexdigest()}"
+    if set(keys) <= cache.get(memo_key, set()):
+        return
+
+    now = timezone.now()
+    SurrogateKeyUrl.objects.bulk_create(
+        [SurrogateKeyUrl(key=key, url=url, recorded_at=now) for key in sorted(keys)],
+        update_conflicts=True, unique_fields=["key", "url"], update_fields=["recorded_at"],
+    )
+    cache.set(memo_key, set(keys), settings.SURROGATE_RECORD_INTERVAL)
+
+
+def urls_for(keys) -> list:
+    """The most recently recorded SURROGATE_MAX_URLS_PER_KEY URLs of each key, within SURROGATE_INDEX_TIMEOUT."""
+    from .models import SurrogateKeyUrl
+
+    cutoff = timezone.now() - timedelta(seconds=settings.SURROGATE_INDEX_TIMEOUT)
+    SurrogateKeyUrl.objects.filter(key__in=keys, recorded_at__lt=cutoff).delete()
+    urls = set()
+    for key in keys:
+        urls.update(
+            SurrogateKeyUrl.objects.filter(key=key).order_by("-recorded_at")
+            .values_list("url", flat=True)[:settings.SURROGATE_MAX_URLS_PER_KEY]
+        )
+    return sorted(urls)
+
+
+def purge_keys(instance, extra=()) -> list:
+    """Keys a change to `instance` invalidates: the object itself plus its model's listings."""
+    return [object_key(instance), instance._meta.model_name, *extra]
+
+
+# --------------------- Purge & Pre-warm ---------------------
+def log_purge(keys, urls):
+    logger.info(f"Purge {len(urls)} URLs for {', '.join(keys)}: {' '.join(urls)}")
+
+
+def purge(keys):
+    """
+    Resolve `keys` to the URLs that rendered them and hand both to
+    settings.SURROGATE_PURGE_HANDLER (CDNs that purge by tag use the keys,
+    the others the URLs). Re-renders the URLs when SURROGATE_PREWARM is on.
+    """
+    urls = urls_for(keys)
+    try:
+        import_string(settings.SURROGATE_PURGE_HANDLER)(keys, urls)
+    except Exception as e:
+        logger.error(f"Surrogate purge failed for {keys}: {e}")
+    if settings.SURROGATE_PREWARM and urls:
+        prewarm(urls[:settings.SURROGATE_PREWARM_LIMIT])
+    return urls
+
+
+def prewarm(urls):
+    """Render each URL in-process so fragment caches and prebuilt documents are rebuilt."""
+    from django.test import Client
+
+    host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != "*" else "localhost"
+    client = Client(HTTP_HOST=host.lstrip("."), raise_request_exception=False)
+    for url in urls:
+        try:
+            response = client.get(url)
+            if response.status_code != 200:
+                logger.warning(f"Pre-warm of {url} returned {response.status_code}")
+        except Exception as e:
+            logger.error(f"Pre-warm of {url} failed: {e}")
+
+
+# --------------------- Middleware ---------------------
+class SurrogateKeyMiddleware:
+    """
+    Tag cacheable GET responses with the content objects they rendered
+    (collected from post_init, see base/signals.py) plus the collection keys
+    of listing routes, and remember which URLs carry each key.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return self.get_response(request)
+
+        token = _keys.set(set())
+        try:
+            response = self.get_response(request)
+            keys = _keys.get()
+        finally:
+            _keys.reset(token)
+
+        match = request.resolver_match
+        if match:
+            keys.update(COLLECTION_ROUTES.get(match.url_name, ()))
+        cache_control = response.get("Cache-Control", "")
+        if keys and response.status_code == 200 and "private" not in cache_control and "no-store" not in cache_control:
+            header = " ".join(sorted(keys))
+            for name in settings.SURROGATE_KEY_HEADERS:
+                response[name] = header
+            try:
+                record(keys, canonical_url(request))
+            except Exception as e:
+                logger.error(f"Could not record surrogate keys for {request.path}: {e}")
+        return response
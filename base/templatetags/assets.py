@@ -0,0 +1,55 @@
+from functools import lru_cache
+from django import template
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from ..assets import IMAGE_VARIANTS, critical_name, critical_template_html, extract_critical_css, variant_name
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _collected(name):
+    return staticfiles_storage.exists(name)
+
+
+@lru_cache(maxsize=None)
+def _critical_css(path):
+    name = critical_name(path)
+    if _collected(name):
+        with staticfiles_storage.open(name) as handle:
+            return handle.read().decode("utf-8")
+
+    # Not collected yet (local development): extract from the source file
+    source = finders.find(path)
+    if not source:
+        return ""
+    with open(source, encoding="utf-8") as handle:
+        return extract_critical_css(handle.read(), critical_template_html())
+
+
+@register.simple_tag
+def critical_css(path):
+    """Inline the above-the-fold subset of a stylesheet."""
+    css = _critical_css(path)
+    return mark_safe(f"<style>{css}</style>") if css else ""
+
+
+@register.simple_tag
+def picture(path, alt="", **attrs):
+    """
+    Render a <picture> with AVIF/WebP sources for a static PNG/JPEG when
+    collectstatic produced them, falling back to the original image.
+    """
+    sources = [
+        format_html('<source type="{}" srcset="{}" />', mime, static(variant_name(path, ext)))
+        for ext, mime in IMAGE_VARIANTS
+        if _collected(variant_name(path, ext))
+    ]
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}"{} /></picture>',
+        mark_safe("".join(sources)), static(path), alt, flatatt(attrs),
+    )
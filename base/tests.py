@@ -1,3 +1,426 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .cache import content_version
+from . import llm
+from .llm import BackendUnavailable, GenerationClient, stub_server
+from .utils import generate_assistant_response
+from .models import (
+    Article, ArticleStatus, CaseStudy, Event, EventGalleryImage, EventOccurrence, Inquiry, InquiryResponse,
+    RecurrenceFrequency, RelatedContent, SenderType, Service, ServiceCategory, ServiceStatus, SoftwareSolution,
+)
 
-# Create your tests here.
+
+# --------------------- Published Querysets ---------------------
+class PublishedQuerySetTests(TestCase):
+    """
+    `published()` must agree with each model's `is_published`, and public
+    listings must be answered from the partial indexes rather than by
+    scanning the unpublished rows.
+    """
+
+    HIDDEN = 2000  # drafts / archived / private rows per model
+    VISIBLE = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        past, future = now - timedelta(days=1), now + timedelta(days=30)
+
+        def rows(model, hidden, visible, **common):
+            objs = [model(slug=f"hidden-{i}", title=f"Hidden {i}", **common, **hidden(i)) for i in range(cls.HIDDEN)]
+            objs += [model(slug=f"visible-{i}", title=f"Visible {i}", **common, **visible(i)) for i in range(cls.VISIBLE)]
+            model.objects.bulk_create(objs)
+
+        rows(
+            Article,
+            lambda i: {"status": ArticleStatus.ARCHIVED if i % 2 else ArticleStatus.DRAFT},
+            lambda i: {"status": ArticleStatus.PUBLISHED, "published_at": past},
+            content="",
+        )
+        rows(
+            CaseStudy,
+            lambda i: {"published_at": future if i % 2 else None},
+            lambda i: {"published_at": past},
+        )
+        rows(
+            SoftwareSolution,
+            lambda i: {"published_at": future if i % 2 else None},
+            lambda i: {"published_at": past},
+        )
+        rows(
+            Service,
+            lambda i: {"status": ServiceStatus.INACTIVE if i % 2 else ServiceStatus.COMING_SOON},
+            lambda i: {"status": ServiceStatus.ACTIVE},
+            description="", category=ServiceCategory.NLP,
+        )
+        rows(
+            Event,
+            lambda i: {"is_public": False},
+            lambda i: {"is_public": True},
+            starts_at=now,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"expected {index_name} in plan:\n{plan}")
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_published_matches_is_published(self):
+        for model in (Article, CaseStudy, SoftwareSolution, Service, Event):
+            with self.subTest(model=model.__name__):
+                published = list(model.objects.published())
+                self.assertEqual(len(published), self.VISIBLE)
+                self.assertTrue(all(obj.is_published for obj in published))
+                self.assertFalse(any(obj.is_published for obj in model.objects.exclude(pk__in=[o.pk for o in published])))
+
+    def test_listings_use_partial_indexes(self):
+        cases = [
+            (Article.objects.published().only(*Article.LISTING_FIELDS[:-1])[:3], "article_published_idx"),
+            (CaseStudy.objects.published()[:3], "casestudy_published_idx"),
+            (SoftwareSolution.objects.published()[:3], "solution_published_idx"),
+            (Service.objects.published(), "service_active_idx"),
+            (Event.objects.published()[:6], "event_public_idx"),
+        ]
+        for queryset, index_name in cases:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset, index_name)
+
+    def test_sitemap_columns_are_covered(self):
+        # slug/title/updated_at are INCLUDEd, so Postgres can answer from the index alone
+        queryset = Article.objects.published().order_by("-published_at", "-created_at").values_list("slug", "updated_at")
+        self.assertUsesIndex(queryset, "article_published_idx")
+        if connection.vendor == "postgresql":
+            self.assertIn("Index Only Scan", queryset.explain())
+
+
+# --------------------- Query Budgets ---------------------
+class QueryRecorder:
+    """
+    connection.execute_wrapper that records every statement together with
+    where it came from: project source lines and, for queries triggered
+    while rendering, the template tags/variables that issued them.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql % tuple(repr(p) for p in params) if params and not many else sql, self.locations()))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @staticmethod
+    def locations(limit=4):
+        root = str(settings.BASE_DIR)
+        found, frame = [], sys._getframe(2)
+        while frame and len(found) < limit:
+            code = frame.f_code
+            node = frame.f_locals.get("self") if code.co_name == "render_annotated" else None
+            if node is not None and getattr(node, "token", None) and getattr(node, "origin", None):
+                found.append(f"{node.origin.template_name}:{node.token.lineno} {{{{ {node.token.contents[:60]} }}}}")
+            elif code.co_filename.startswith(root) and os.path.dirname(code.co_filename) != root \
+                    and "site-packages" not in code.co_filename and code.co_filename != __file__:
+                found.append(f"{os.path.relpath(code.co_filename, root)}:{frame.f_lineno} in {code.co_name}")
+            frame = frame.f_back
+        return found
+
+    def report(self):
+        lines = []
+        for n, (sql, locations) in enumerate(self.queries, 1):
+            lines.append(f"{n}. {sql[:400]}")
+            lines += [f"     at {location}" for location in locations]
+        return "\n".join(lines)
+
+
+def seed_content(start, count, author):
+    """Bulk-create `count` published rows of each content model (and their children), numbered from `start`."""
+    now = timezone.now()
+    numbers = range(start, start + count)
+    Article.objects.bulk_create([
+        Article(title=f"Article {i}", slug=f"article-{i}", content=f"Body {i}", excerpt=f"Excerpt {i}",
+                status=ArticleStatus.PUBLISHED, published_at=now - timedelta(hours=i), author=author)
+        for i in numbers
+    ])
+    solutions = SoftwareSolution.objects.bulk_create([
+        SoftwareSolution(title=f"Solution {i}", slug=f"solution-{i}", published_at=now, created_by=author)
+        for i in numbers
+    ])
+    case_studies = CaseStudy.objects.bulk_create([
+        CaseStudy(title=f"Case {i}", slug=f"case-{i}", summary=f"Summary {i}", published_at=now, created_by=author)
+        for i in numbers
+    ])
+    CaseStudy.solutions.through.objects.bulk_create([
+        CaseStudy.solutions.through(casestudy_id=case.pk, softwaresolution_id=solution.pk)
+        for case in case_studies for solution in solutions[:2]
+    ])
+    Service.objects.bulk_create([
+        Service(title=f"Service {i}", slug=f"service-{i}", description=f"Service {i}",
+                category=ServiceCategory.NLP, features=["Chatbots", f"Feature {i}"], created_by=author)
+        for i in numbers
+    ])
+    events = Event.objects.bulk_create([
+        Event(title=f"Event {i}", slug=f"event-{i}", starts_at=now + timedelta(days=i % 20, hours=1),
+              location="Kathmandu, Nepal", latitude=27.7172, longitude=85.324, created_by=author,
+              recurrence_frequency=RecurrenceFrequency.WEEKLY if i % 5 == 0 else "")
+        for i in numbers
+    ])
+    EventOccurrence.objects.bulk_create([
+        EventOccurrence(event=event, starts_at=event.starts_at + timedelta(weeks=w))
+        for event in events if event.recurrence_frequency for w in range(4)
+    ])
+    EventGalleryImage.objects.bulk_create([
+        EventGalleryImage(event=event, image=f"event_gallery/{event.slug}-{n}.jpg", order=n)
+        for event in events for n in range(2)
+    ])
+    inquiries = Inquiry.objects.bulk_create([
+        Inquiry(name=f"Customer {i}", email=f"customer{i}@example.com", job_details=f"Need help {i}")
+        for i in numbers
+    ])
+    InquiryResponse.objects.bulk_create([
+        InquiryResponse(inquiry=inquiry, sender_type=SenderType.ADMIN, admin=author, body="Thanks")
+        for inquiry in inquiries
+    ])
+    articles = list(Article.objects.filter(slug__in=[f"article-{i}" for i in numbers]).values_list("pk", flat=True))
+    RelatedContent.objects.bulk_create([
+        RelatedContent(source_type="article", source_id=pk, rank=0, target_type="article",
+                       target_id=articles[0], score=0.5, title="Article", url="/articles/article/")
+        for pk in articles[1:]
+    ])
+
+
+@override_settings(
+    SITE_URL="https://example.com",
+    PREBUILT_ROOT=os.path.join(tempfile.gettempdir(), "query-budget-prebuilt"),
+    RETRIEVAL_INDEX_PATH=os.path.join(tempfile.gettempdir(), "query-budget-retrieval.npz"),
+    RELATED_INDEX_PATH=os.path.join(tempfile.gettempdir(), "query-budget-related.npz"),
+)
+class QueryBudgetTests(TestCase):
+    """
+    Every public view and admin page runs within a fixed number of queries,
+    and that number stays the same when the tables grow (no N+1). Each
+    request is measured cold: caches and prebuilt documents are cleared
+    first. A failure lists each statement with the code or template line
+    that issued it.
+    """
+
+    SCALE = 10
+    GROWTH = 40  # rows added per model before measuring again
+
+    # Cold public pages include the upsert that records their surrogate keys
+    PUBLIC_BUDGETS = {
+        "home": 3,
+        "services": 3,
+        "services_catalog": 5,  # total count, page, facets version, facets, surrogate keys
+        "case-study": 4,
+        "case_studies_details": 5,
+        "articles": 3,
+        "articles_details": 5,
+        "articles_feed_rss": 3,
+        "events": 4,
+        "events_details": 5,
+        "events_feed_json": 5,
+        "events_feed_ics": 5,
+        "events_nearby": 2,
+        "sitemap": 13,  # document version, then a cold build: last-modified and count per section
+        "sitemap_section": 3,
+        "api_list": 2,
+        "api_detail": 2,
+        "contact": 1,
+        "ai-assistant": 1,
+    }
+    POST_BUDGETS = {
+        "contact": 2,
+        # + the conversation memory write: count, savepoint, select, insert, release on the cache table
+        "ai-assistant": 6,
+    }
+    # Admin pages pay for the session, the user, jet's menu and bookmarks (5) before any content
+    CHANGELIST_BUDGETS = {
+        "base.SoftwareSolution": 9,
+        "base.CaseStudy": 9,
+        "base.Service": 7,
+        "base.Article": 7,
+        "base.Event": 7,
+        "base.Inquiry": 7,
+        "base.InquiryResponse": 7,
+        "auth.User": 8,
+    }
+    CHANGE_FORM_BUDGETS = {
+        "base.SoftwareSolution": 6,
+        "base.CaseStudy": 8,
+        "base.Service": 6,
+        "base.Article": 6,
+        "base.Event": 10,
+        "base.Inquiry": 6,
+        "base.InquiryResponse": 9,
+        "auth.User": 10,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser("budget-admin", "admin@example.com", "password")
+        seed_content(0, cls.SCALE, cls.staff)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.anonymous = Client()
+        # Versions live in the shared cache and outlive the per-process one cleared before each measurement
+        cache.clear()
+        for name in ("site", "events", "prebuilt", "services"):
+            content_version(name)
+
+    def measure(self, request):
+        cache.clear()
+        ContentType.objects.clear_cache()
+        shutil.rmtree(settings.PREBUILT_ROOT, ignore_errors=True)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = request()
+        self.assertLess(response.status_code, 400, f"{response.status_code} from {response.request['PATH_INFO']}")
+        return recorder
+
+    def assertBudgets(self, requests, budgets):
+        """Measure `requests` (name -> callable), grow every table, measure again, compare."""
+        before = {name: self.measure(request) for name, request in requests.items()}
+        seed_content(1000, self.GROWTH, self.staff)
+        after = {name: self.measure(request) for name, request in requests.items()}
+        for name in requests:
+            with self.subTest(page=name):
+                budget = budgets[name]
+                self.assertLessEqual(
+                    len(before[name]), budget,
+                    f"{name}: {len(before[name])} queries, budget {budget}\n{before[name].report()}")
+                self.assertEqual(
+                    len(after[name]), len(before[name]),
+                    f"{name}: {len(before[name])} queries with {self.SCALE} rows per table, "
+                    f"{len(after[name])} after adding {self.GROWTH}\n{after[name].report()}")
+
+    def test_public_views(self):
+        get = self.anonymous.get
+        urls = {
+            "home": reverse("home"),
+            "services": reverse("services"),
+            "services_catalog": reverse("services_catalog") + "?category=nlp",
+            "case-study": reverse("case-study"),
+            "case_studies_details": reverse("case_studies_details", args=["case-0"]),
+            "articles": reverse("articles"),
+            "articles_details": reverse("articles_details", args=["article-1"]),
+            "articles_feed_rss": reverse("articles_feed", args=["rss"]),
+            "events": reverse("events"),
+            "events_details": reverse("events_details", args=["event-0"]),
+            "events_feed_json": reverse("events_feed_json"),
+            "events_feed_ics": reverse("events_feed_ics"),
+            "events_nearby": reverse("events_nearby") + "?near=Kathmandu",
+            "sitemap": reverse("sitemap"),
+            "sitemap_section": reverse("sitemap_section", args=["articles", 1]),
+            "api_list": reverse("api_list", args=["articles"]),
+            "api_detail": reverse("api_detail", args=["articles", "article-1"]),
+            "contact": reverse("contact"),
+            "ai-assistant": reverse("ai-assistant"),
+        }
+        self.assertBudgets({name: (lambda url=url: get(url)) for name, url in urls.items()}, self.PUBLIC_BUDGETS)
+
+    def test_form_posts(self):
+        def contact():
+            return self.anonymous.post(reverse("contact"), {
+                "name": "Visitor", "email": "visitor@example.com", "job_details": "We would like a quote"})
+
+        def assistant():
+            return self.anonymous.post(
+                reverse("ai-assistant"), json.dumps({"message": "What services do you offer?"}),
+                content_type="application/json")
+
+        contact()  # the first inquiry of the day also creates its rollup row
+        self.assertBudgets({"contact": contact, "ai-assistant": assistant}, self.POST_BUDGETS)
+
+    def registered_admins(self):
+        return [(model, model_admin) for model, model_admin in admin.site._registry.items()
+                if model._meta.app_label in ("base", "auth") and model is not Group]
+
+    def test_admin_changelists(self):
+        requests = {
+            model._meta.label: (lambda model=model: self.client.get(
+                reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")))
+            for model, _ in self.registered_admins()
+        }
+        self.assertBudgets(requests, self.CHANGELIST_BUDGETS)
+
+    def test_admin_change_forms(self):
+        requests = {}
+        for model, _ in self.registered_admins():
+            pk = model.objects.order_by("pk").values_list("pk", flat=True).first()
+            url = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_change", args=[pk])
+            requests[model._meta.label] = lambda url=url: self.client.get(url)
+        self.assertBudgets(requests, self.CHANGE_FORM_BUDGETS)
+
+
+# --------------------- LLM Backend ---------------------
+@override_settings(
+    LLM_BACKEND="base.llm.OpenAIChatBackend", LLM_TIMEOUT=1, LLM_QUEUE_TIMEOUT=1,
+    LLM_MAX_CONCURRENCY=2, LLM_BREAKER_FAILURES=2, LLM_BREAKER_RESET=60,
+)
+class GenerationClientTests(TestCase):
+    """The assistant's LLM client against the local stub server."""
+
+    MESSAGES = [{"role": "user", "content": "What services do you offer?"}]
+
+    def setUp(self):
+        self.stub = stub_server(delay=0.2)
+        threading.Thread(target=self.stub.serve_forever, daemon=True).start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+        self.settings_override = override_settings(LLM_API_BASE=f"http://127.0.0.1:{self.stub.server_port}/v1")
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client_ = GenerationClient()
+        self.addCleanup(self.client_.close)
+
+    def test_identical_prompts_in_flight_share_one_call(self):
+        answers = []
+        threads = [threading.Thread(target=lambda: answers.append(self.client_.generate(self.MESSAGES)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(answers, ["Stub answer to: What services do you offer?"] * 5)
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_timeout(self):
+        self.stub.delay = 1.5
+        with self.assertRaises(BackendUnavailable):
+            self.client_.generate(self.MESSAGES)
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        self.stub.delay, self.stub.fail = 0, True
+        for _ in range(2):
+            with self.assertRaises(BackendUnavailable):
+                self.client_.generate(self.MESSAGES)
+        self.assertTrue(self.client_.breaker.is_open)
+        with self.assertRaisesMessage(BackendUnavailable, "circuit breaker open"):
+            self.client_.generate(self.MESSAGES)
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_assistant_falls_back_to_rules(self):
+        self.stub.fail = True
+        with mock.patch.object(llm, "_client", self.client_):
+            self.assertIn("Welcome to <strong>AI Solutions</strong>", generate_assistant_response("hello"))
+            self.assertTrue(self.client_.breaker.consecutive)
@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import home, contact, case_study_list, case_studies_details, articles_page, articles_details, all_events_page, events_details, services, ai_assistant
+from .api import api_detail, api_list
+from .live import inquiry_events
+from .views import home, contact, case_study_list, case_studies_details, articles_page, articles_details, all_events_page, events_details, events_feed, events_nearby, services, services_catalog, ai_assistant, sitemap_index, sitemap_section, articles_feed
 urlpatterns = [
     path('', home, name="home"),
+    path('sitemap.xml', sitemap_index, name="sitemap"),
+    path('sitemap-<slug:section>-<int:page>.xml', sitemap_section, name="sitemap_section"),
     path('services/', services, name="services"),
+    path('services/catalog.json', services_catalog, name="services_catalog"),
     path('ai-assistant/', ai_assistant, name="ai-assistant"),
     path('contact/', contact, name='contact'),
     path("case-study/", case_study_list, name="case-study"),
@@ -10,7 +15,16 @@ urlpatterns = [
          name="case_studies_details"),
 
     path('articles/', articles_page, name="articles"),
+    path('articles/feed/<str:fmt>/', articles_feed, name="articles_feed"),
     path('articles/<slug:slug>/', articles_details, name="articles_details"),
     path('events/', all_events_page, name="events"),
+    path('events/feed.json', events_feed, {'fmt': 'json'}, name="events_feed_json"),
+    path('events/feed.ics', events_feed, {'fmt': 'ics'}, name="events_feed_ics"),
+    path('events/nearby.json', events_nearby, name="events_nearby"),
     path('events/<slug:slug>/', events_details, name="events_details"),
+
+    # read-only content API
+    path('api/v1/<slug:resource>/', api_list, name="api_list"),
+    path('api/v1/<slug:resource>/<slug:slug>/', api_detail, name="api_detail"),
+    path('live/inquiries/', inquiry_events, name="inquiry_events"),
 ]
@@ -2,7 +2,11 @@ import uuid
 import os
 import json
 import logging
-from django.utils.text import slugify
+from django.conf import settings
+from django.core.validators import RegexValidator
+from django.urls import reverse
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator, slugify
 from django.http import JsonResponse
 from django.shortcuts import render
 from dotenv import load_dotenv
@@ -12,6 +16,12 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Phone number validator (contact form and lead import)
+phone_validator = RegexValidator(
+    regex=r'^\+?[0-9\-\s()]{7,20}$',
+    message="Enter a valid phone number with country code (e.g. +977-9812345678)."
+)
+
 # --------------------- Slug Generator ---------------------
 def generate_slug(title: str, class_name) -> str:
     """Generate unique slug for a model instance"""
@@ -28,13 +38,13 @@ def get_company_context():
     from .models import Service, CaseStudy
 
     # Get services
-    services = Service.objects.filter(status="active")[:6]
+    services = Service.objects.published()[:6]
     services_info = "\n".join(
         [f"- {s.title}: {s.short_description}" for s in services]
     ) if services.exists() else "AI/ML Services, NLP Solutions, Computer Vision"
 
     # Get case studies
-    case_studies = CaseStudy.objects.all()[:3]
+    case_studies = CaseStudy.objects.published()[:3]
     case_studies_info = "\n".join(
         [f"- {cs.title}: {cs.summary}" for cs in case_studies]
     ) if case_studies.exists() else "Multiple successful AI implementation projects"
@@ -55,21 +65,97 @@ CONTACT INFORMATION:
 """
 
 
+# --------------------- Conversation Entities ---------------------
+def conversation_entity(instance) -> dict:
+    """Compact reference to a listed object, as kept in ConversationMemory."""
+    from .retrieval import source_key
+
+    if instance._meta.model_name == "service":
+        url = reverse("services")
+    else:
+        url = reverse("case_studies_details", args=[instance.slug])
+    return {"source": source_key(instance), "title": instance.title, "url": url}
+
+
+def render_entity_details(entity):
+    """Answer a follow-up about a remembered entity, or None if it is gone."""
+    # Import here to avoid circular import
+    from .models import Article, CaseStudy, Service
+
+    models = {"article": Article, "casestudy": CaseStudy, "service": Service}
+    model_name, _, pk = entity["source"].partition(":")
+    model = models.get(model_name)
+    obj = model.objects.published().filter(pk=pk).first() if model and pk.isdigit() else None
+    if obj is None:
+        return None
+
+    if isinstance(obj, Service):
+        body = obj.description or obj.short_description
+        extra = "".join(f"<li>{escape(f)}</li>" for f in obj.features if isinstance(f, str)) \
+            if isinstance(obj.features, list) else ""
+    elif isinstance(obj, CaseStudy):
+        body = obj.summary or obj.problem
+        extra = "".join(
+            f"<li><strong>{label}:</strong> {escape(Truncator(text).words(30))}</li>"
+            for label, text in (("Problem", obj.problem), ("Solution", obj.solution), ("Results", obj.results))
+            if text
+        )
+    else:
+        body, extra = obj.display_excerpt, ""
+
+    extra_html = f'<ul class="list-disc list-inside mt-2 space-y-1">{extra}</ul><br/>' if extra else ""
+    return f"""
+    <p><strong>{escape(obj.title)}</strong></p>
+    <p>{escape(Truncator(body).words(80))}</p>
+    <br/>
+    {extra_html}
+    <p>Read more on <a href="{escape(entity['url'])}" class="text-emerald-400 underline">its page</a> or <a href="/contact/" class="text-emerald-400 underline">contact us</a> to discuss it.</p>
+    """
+
+
+# --------------------- Assistant Response ---------------------
+def generate_assistant_response(query: str, memory=None) -> str:
+    """
+    Answer from the LLM_BACKEND when one is configured (see base/llm.py),
+    falling back to the rule-based reply when it is unset, failing, timing
+    out, saturated or held open by the circuit breaker.
+    """
+    if settings.LLM_BACKEND:
+        from .llm import BackendUnavailable, generate
+
+        try:
+            return linebreaks(generate(query, memory=memory), autoescape=True)
+        except BackendUnavailable as e:
+            logger.warning(f"LLM backend unavailable, using the rule-based reply: {e}")
+    return generate_rule_based_response(query, memory=memory)
+
+
 # --------------------- Simple Chatbot Response ---------------------
-def generate_gemini_response(query: str) -> str:
+def generate_rule_based_response(query: str, memory=None) -> str:
     """
     Simple rule-based chatbot for AI Solutions company.
-    No external API needed - just pattern matching and responses.
+    No external API needed - pattern matching plus snippets from the local
+    retrieval index (base/retrieval.py). When a ConversationMemory is given,
+    follow-ups are resolved against the entities listed in earlier answers.
     """
     # Import here to avoid circular import
     from .models import Service, CaseStudy
+    from .retrieval import render_hits, search
 
     query_lower = query.lower().strip()
 
+    # Follow-ups ("tell me more about the second one")
+    if memory is not None:
+        entity = memory.resolve(query)
+        details = render_entity_details(entity) if entity else None
+        if details:
+            memory.focus = entity
+            return details
+
     # Get company data
     try:
-        services = Service.objects.filter(status="active")
-        case_studies = CaseStudy.objects.all()[:3]
+        services = Service.objects.published()
+        case_studies = CaseStudy.objects.published()[:3]
     except:
         services = []
         case_studies = []
@@ -98,11 +184,28 @@ def generate_gemini_response(query: str) -> str:
         </ul>
         """
 
+    # Answer from site content when the question matches it closely enough
+    try:
+        hits = [
+            hit for hit in search(query)
+            if hit["coverage"] >= settings.RETRIEVAL_MIN_COVERAGE
+        ]
+    except Exception as e:
+        logger.error(f"Retrieval lookup failed: {e}")
+        hits = []
+    if hits:
+        if memory is not None:
+            memory.show({"source": h["source"], "title": h["title"], "url": h["url"]} for h in hits)
+        return render_hits(hits)
+
     # Services
     if any(keyword in query_lower for keyword in service_keywords):
         if services:
+            listed = list(services[:6])
+            if memory is not None:
+                memory.show(conversation_entity(s) for s in listed)
             services_html = "<ul class='list-disc list-inside mt-2 space-y-2'>"
-            for service in services[:6]:
+            for service in listed:
                 services_html += f"<li><strong>{service.title}</strong>: {service.short_description}</li>"
             services_html += "</ul>"
 
@@ -175,6 +278,8 @@ def generate_gemini_response(query: str) -> str:
     # Case studies
     if any(keyword in query_lower for keyword in case_study_keywords):
         if case_studies:
+            if memory is not None:
+                memory.show(conversation_entity(cs) for cs in case_studies)
             cs_html = "<ul class='list-disc list-inside mt-2 space-y-2'>"
             for cs in case_studies:
                 cs_html += f"<li><strong>{cs.title}</strong>: {cs.summary[:100]}...</li>"
@@ -1,25 +1,38 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
-from django.db.models import Count
-from django.core.paginator import Paginator
-from .models import Inquiry, CaseStudy, Article, Event, Service
+from django.http import HttpResponse, JsonResponse
+from django.db.models import Q
+from .models import Inquiry, CaseStudy, Article, Event, EventOccurrence, Service
 from django.contrib import messages
-from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.contrib.messages import get_messages
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
-from .utils import generate_gemini_response
+from .utils import generate_assistant_response, phone_validator
+from .memory import ConversationMemory
+from .cache import content_version
+from .ical import render_calendar
+from .geo import geocode, nearest
+from .recurrence import expand
+from .related import related_for
+from .catalog import CatalogError, filter_services, service_facets
+from .feeds import build_articles_feed, build_sitemap_index, build_sitemap_page, detail_sections
+from .prebuilt import document_path, prebuilt_response
+from django.conf import settings
+from django.http import Http404
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition, require_GET
+from datetime import datetime, time, timedelta
 import json
 import logging
+import math
+import os
 
 logger = logging.getLogger(__name__)
-# Phone number validator
-phone_validator = RegexValidator(
-    regex=r'^\+?[0-9\-\s()]{7,20}$',
-    message="Enter a valid phone number with country code (e.g. +977-9812345678)."
-)
 
 
 def generate_toasts_from_messages(request):
@@ -116,9 +129,9 @@ def handle_inquiry_submission(request):
 
 
 def home(request):
-    case_studies = CaseStudy.objects.all()[:3]
-    articles = Article.objects.filter(status='published')[:3]
-    events = Event.objects.all()[:6]
+    case_studies = CaseStudy.objects.published()[:3]
+    articles = Article.objects.published().select_related('author').only(*Article.LISTING_FIELDS)[:3]
+    events = Event.objects.published()[:6]
 
     context = {
         "case_studies": case_studies,
@@ -131,7 +144,11 @@ def home(request):
 
 
 def articles_page(request):
-    articles = Article.objects.filter(status='published').order_by('-published_at')
+    articles = (
+        Article.objects.published()
+        .select_related('author')
+        .only(*Article.LISTING_FIELDS)
+    )
     context = {
         "articles": articles,
     }
@@ -141,8 +158,10 @@ def articles_page(request):
 
 def articles_details(request, slug):
     try:
-        article = Article.objects.get(slug=slug)
-        return render(request, "base/pages/articles-details.html", {"article": article})
+        # `content` is only read as a fallback for rows saved before pre-rendering
+        article = Article.objects.published().select_related('author').defer('content').get(slug=slug)
+        return render(request, "base/pages/articles-details.html", {
+            "article": article, "related": related_for(article)})
     except Article.DoesNotExist:
         from django.http import Http404
         raise Http404("Article not found")
@@ -151,14 +170,14 @@ def articles_details(request, slug):
 
 
 def all_events_page(request):
-    events = Event.objects.all().order_by('starts_at')
+    events = Event.objects.published().prefetch_related("gallery_images")
     return render(request, "base/pages/events.html", {"events": events})
 
 
 def events_details(request, slug):
     try:
-        event = Event.objects.get(slug=slug)
-        return render(request, "base/pages/events-details.html", {"event": event})
+        event = Event.objects.published().prefetch_related("gallery_images").get(slug=slug)
+        return render(request, "base/pages/events-details.html", {"event": event, "related": related_for(event)})
     except Event.DoesNotExist:
         from django.http import Http404
         raise Http404("Event not found")
@@ -166,8 +185,260 @@ def events_details(request, slug):
 
 
 
+# --------------------- Events Calendar Feed ---------------------
+CALENDAR_DEFAULT_DAYS = 31
+CALENDAR_MAX_DAYS = 366
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+
+
+def parse_calendar_range(request):
+    """
+    Return the [start, end) date bucket requested with ?start=&end= (ISO
+    dates). Defaults to the next month; raises ValueError on bad input.
+    """
+    def read(name, default):
+        value = request.GET.get(name)
+        if not value:
+            return default
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format")
+        return parsed
+
+    start = read("start", timezone.localdate())
+    end = read("end", start + timedelta(days=CALENDAR_DEFAULT_DAYS))
+    if end <= start:
+        raise ValueError("'end' must be after 'start'")
+    if (end - start).days > CALENDAR_MAX_DAYS:
+        raise ValueError(f"The range cannot exceed {CALENDAR_MAX_DAYS} days")
+    return start, end
+
+
+FEED_FIELDS = ("title", "slug", "description", "starts_at", "ends_at", "location", "updated_at")
+
+
+def public_events_between(start, end):
+    """
+    Public event occurrences starting in [start, end), ordered by start.
+
+    One-off events come from the partial event_public_idx index and
+    recurring series from their materialised EventOccurrence rows; only
+    series whose stored range doesn't cover the window are expanded lazily,
+    and then only over the parts of the window outside it.
+    """
+    start = timezone.make_aware(datetime.combine(start, time.min))
+    end = timezone.make_aware(datetime.combine(end, time.min))
+
+    events = [
+        {**row, "recurring": False}
+        for row in Event.objects.published()
+        .filter(recurrence_frequency="", starts_at__gte=start, starts_at__lt=end)
+        .values(*FEED_FIELDS)
+    ]
+
+    series_fields = [name for name in FEED_FIELDS if name not in ("starts_at", "ends_at")]
+    stored = (
+        EventOccurrence.objects.filter(event__is_public=True, starts_at__gte=start, starts_at__lt=end)
+        .values("starts_at", "ends_at", *(f"event__{name}" for name in series_fields))
+    )
+    for row in stored:
+        events.append({
+            **{name: row[f"event__{name}"] for name in series_fields},
+            "starts_at": row["starts_at"],
+            "ends_at": row["ends_at"],
+            "recurring": True,
+        })
+
+    unstored = (
+        Event.objects.published()
+        .exclude(recurrence_frequency="")
+        .filter(starts_at__lt=end)
+        .filter(Q(occurrences_until__isnull=True) | Q(occurrences_until__lt=end) | Q(occurrences_from__gt=start))
+        .filter(Q(recurrence_until__isnull=True) | Q(recurrence_until__gte=start))
+        .order_by()
+        .values(*FEED_FIELDS, "recurrence_frequency", "recurrence_interval",
+                "recurrence_until", "recurrence_count", "occurrences_from", "occurrences_until")
+    )
+    for series in unstored:
+        stored_from, stored_until = series["occurrences_from"], series["occurrences_until"]
+        if stored_until is None:
+            windows = [(start, end)]
+        else:
+            windows = [(start, min(end, stored_from)), (max(start, stored_until + timedelta(microseconds=1)), end)]
+        for window_start, window_end in windows:
+            if window_start >= window_end:
+                continue
+            for starts_at, ends_at in expand(series, window_start, window_end):
+                events.append({
+                    **{name: series[name] for name in FEED_FIELDS},
+                    "starts_at": starts_at,
+                    "ends_at": ends_at,
+                    "recurring": True,
+                })
+
+    events.sort(key=lambda event: (event["starts_at"], event["slug"]))
+    return events
+
+
+def events_feed_etag(request, fmt):
+    try:
+        start, end = parse_calendar_range(request)
+    except ValueError:
+        return None
+    return f"{fmt}-{content_version('events')}-{start:%Y%m%d}-{end:%Y%m%d}"
+
+
+@require_GET
+@condition(etag_func=events_feed_etag)
+def events_feed(request, fmt):
+    """JSON / iCalendar feed of public events, cached per date bucket."""
+    try:
+        start, end = parse_calendar_range(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    host = request.get_host()
+    cache_key = f"events-feed:{fmt}:{host}:{content_version('events')}:{start}:{end}"
+    body = cache.get(cache_key)
+    if body is None:
+        events = public_events_between(start, end)
+        for event in events:
+            event["url"] = request.build_absolute_uri(
+                reverse("events_details", args=[event["slug"]]))
+
+        if fmt == "ics":
+            body = render_calendar(events, "AI-Solutions Events", host.split(":")[0])
+        else:
+            body = json.dumps({
+                "start": start,
+                "end": end,
+                "events": [
+                    {key: value for key, value in event.items() if key != "updated_at"}
+                    for event in events
+                ],
+            }, cls=DjangoJSONEncoder)
+        cache.set(cache_key, body, CALENDAR_CACHE_TIMEOUT)
+
+    content_type = "text/calendar; charset=utf-8" if fmt == "ics" else "application/json"
+    response = HttpResponse(body, content_type=content_type)
+    patch_cache_control(response, public=True, max_age=300)
+    return response
+
+
+# --------------------- Nearby Events ---------------------
+NEARBY_MAX_LIMIT = 100
+
+
+@require_GET
+def events_nearby(request):
+    """
+    Public upcoming events near ?lat=&lng= (or a place name in ?near=),
+    within ?radius= km, nearest first.
+    """
+    try:
+        if request.GET.get("near"):
+            point = geocode(request.GET["near"])
+            if point is None:
+                raise ValueError(f"Unknown place '{request.GET['near']}'")
+            latitude, longitude = point
+        else:
+            latitude, longitude = float(request.GET["lat"]), float(request.GET["lng"])
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError("Coordinates out of range")
+        radius = float(request.GET.get("radius", settings.EVENTS_NEARBY_DEFAULT_RADIUS_KM))
+        if not (math.isfinite(radius) and radius > 0):
+            raise ValueError("Radius must be a positive number of km")
+        radius = min(radius, settings.EVENTS_NEARBY_MAX_RADIUS_KM)
+        limit = min(max(int(request.GET.get("limit", 20)), 1), NEARBY_MAX_LIMIT)
+    except KeyError:
+        return JsonResponse({"error": "Pass 'lat' and 'lng', or 'near'"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    now = timezone.now()
+    events = Event.objects.published().filter(Q(starts_at__gte=now) | Q(occurrences_until__gte=now))
+    rows = nearest(events, latitude, longitude, radius, limit,
+                   fields=("title", "slug", "starts_at", "ends_at", "location", "recurrence_frequency",
+                           "recurrence_interval", "recurrence_until", "recurrence_count"))
+    for row in rows:
+        # Recurring series are listed at their next occurrence
+        if row["recurrence_frequency"]:
+            row["starts_at"], row["ends_at"] = next(expand(row, now), (row["starts_at"], row["ends_at"]))
+        row["recurring"] = bool(row.pop("recurrence_frequency"))
+        for name in ("recurrence_interval", "recurrence_until", "recurrence_count"):
+            del row[name]
+        row["url"] = request.build_absolute_uri(reverse("events_details", args=[row["slug"]]))
+
+    response = HttpResponse(json.dumps({
+        "origin": {"lat": latitude, "lng": longitude},
+        "radius_km": radius,
+        "events": rows,
+    }, cls=DjangoJSONEncoder), content_type="application/json")
+    patch_cache_control(response, public=True, max_age=300)
+    return response
+
+
+# --------------------- Sitemaps & Feeds ---------------------
+def site_base_url(request):
+    return settings.SITE_URL.rstrip("/") or f"{request.scheme}://{request.get_host()}"
+
+
+def persist_documents() -> bool:
+    # Without SITE_URL the URLs come from the request's host (preview
+    # deployments, aliases), so the documents are built per request instead
+    return bool(settings.SITE_URL)
+
+
+def sitemap_index(request):
+    base_url = site_base_url(request)
+    return prebuilt_response(
+        "sitemap.xml",
+        lambda handle: build_sitemap_index(handle, base_url),
+        "application/xml",
+        persist=persist_documents(),
+    )
+
+
+def sitemap_section(request, section, page):
+    if page < 1:
+        raise Http404("Sitemap page out of range")
+    name = f"sitemap-{section}-{page}.xml"
+    if not (persist_documents() and os.path.exists(document_path(name))):
+        sections = detail_sections()
+        if section == "pages":
+            pages = 1
+        elif section in sections:
+            pages = max(1, -(-sections[section][0].count() // settings.SITEMAP_PAGE_SIZE))
+        else:
+            raise Http404("Unknown sitemap section")
+        if page > pages:
+            raise Http404("Sitemap page out of range")
+
+    base_url = site_base_url(request)
+    return prebuilt_response(
+        name,
+        lambda handle: build_sitemap_page(handle, base_url, section, page),
+        "application/xml",
+        persist=persist_documents(),
+    )
+
+
+def articles_feed(request, fmt):
+    if fmt not in ("rss", "atom"):
+        raise Http404("Unknown feed format")
+
+    base_url = site_base_url(request)
+    content_type = "application/atom+xml" if fmt == "atom" else "application/rss+xml"
+    return prebuilt_response(
+        f"feeds/articles.{fmt}",
+        lambda handle: build_articles_feed(handle, base_url, fmt),
+        f"{content_type}; charset=utf-8",
+        persist=persist_documents(),
+    )
+
+
 def case_study_list(request):
-    case_studies = CaseStudy.objects.all()
+    case_studies = CaseStudy.objects.published().prefetch_related("solutions")
 
     context = {
         "case_studies": case_studies,
@@ -177,8 +448,9 @@ def case_study_list(request):
 
 def case_studies_details(request, slug):
     try:
-        case_study = CaseStudy.objects.get(slug=slug)
-        return render(request, "base/pages/case-studies-details.html", {"case_study": case_study})
+        case_study = CaseStudy.objects.published().prefetch_related("solutions").get(slug=slug)
+        return render(request, "base/pages/case-studies-details.html", {
+            "case_study": case_study, "related": related_for(case_study)})
     except CaseStudy.DoesNotExist:
         from django.http import Http404
         raise Http404("Case study not found")
@@ -188,13 +460,53 @@ def services(request):
     from .models import Service
 
     # Get all active services, ordered by title
-    services = Service.objects.filter(status='active').order_by('title')
+    services = Service.objects.published()
 
     context = {
         'services': services,
     }
     return render(request, "base/pages/services.html", context)
 
+# --------------------- Service Catalog ---------------------
+CATALOG_MAX_LIMIT = 100
+CATALOG_FIELDS = ("title", "slug", "short_description", "category", "status", "icon", "features")
+
+
+@require_GET
+def services_catalog(request):
+    """
+    Faceted service catalog: ?category=&status= (comma-separated) and
+    repeatable ?feature=, paged with ?offset=&limit=. `count` is the total
+    number of matches and `next` links the following page; facet counts
+    come from the cached aggregate.
+    """
+    try:
+        queryset = filter_services(request.GET)
+        limit = min(max(int(request.GET.get("limit", CATALOG_MAX_LIMIT)), 1), CATALOG_MAX_LIMIT)
+        offset = max(int(request.GET.get("offset", 0)), 0)
+    except CatalogError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except ValueError:
+        return JsonResponse({"error": "'limit' and 'offset' must be integers"}, status=400)
+
+    total = queryset.count()
+    services = list(queryset.order_by("title", "id").values(*CATALOG_FIELDS)[offset:offset + limit]) if offset < total else []
+    next_url = None
+    if offset + limit < total:
+        params = request.GET.copy()
+        params["offset"] = offset + limit
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    response = HttpResponse(json.dumps({
+        "count": total,
+        "services": services,
+        "next": next_url,
+        "facets": service_facets(),
+    }, cls=DjangoJSONEncoder), content_type="application/json")
+    patch_cache_control(response, public=True, max_age=300)
+    return response
+
+
 def contact(request):
     if request.method == "POST":
         handle_inquiry_submission(request)
@@ -210,7 +522,7 @@ def contact(request):
 
 # --------------------- Django View ---------------------
 def ai_assistant(request):
-    """AI Assistant chatbot page view with Gemini integration"""
+    """AI Assistant chatbot page view (LLM backend with rule-based fallback)"""
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -222,12 +534,17 @@ def ai_assistant(request):
                     'is_html': False
                 }, status=400)
 
-            # Generate AI response using Gemini
-            response = generate_gemini_response(user_message)
+            # Per-conversation memory lives in the cache, never in the database
+            memory = ConversationMemory(data.get('conversation_id'))
+
+            response = generate_assistant_response(user_message, memory=memory)
+            memory.add_turn(user_message)
+            memory.save()
 
             return JsonResponse({
                 'response': response,
-                'is_html': True
+                'is_html': True,
+                'conversation_id': memory.id,
             })
         except Exception as e:
             logger.error(f"Error in ai_assistant view: {str(e)}")
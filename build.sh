@@ -10,6 +10,13 @@ pip install -r requirements.txt
 # Run migrations
 echo "Running database migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
+
+# Build the assistant's retrieval index and the related-content vectors into var/
+# (the deployed filesystem is read-only, so requests never build them)
+echo "Building search indexes..."
+python manage.py build_retrieval_index
+python manage.py build_related_content
 
 # Collect static files
 echo "Collecting static files..."
@@ -3,6 +3,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn config.asgi:application``) for the
+live admin inquiry stream (base/live.py): each open stream is then a suspended
+coroutine. Importing this module turns LIVE_EVENTS_ENABLED on; under WSGI the
+stream answers 204 and the admin doesn't open it.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('LIVE_EVENTS_ENABLED', 'True')
 
 application = get_asgi_application()
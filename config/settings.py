@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     "whitenoise.runserver_nostatic",
     'django.contrib.staticfiles',
+    # Compiles the OpClass / GIN index expressions in base/models.py
+    'django.contrib.postgres',
 
     # external apps
     'base',
@@ -56,12 +58,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'base.middleware.PublicPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'base.profiling.TemplateProfilingMiddleware',
+    'base.surrogate.SurrogateKeyMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -76,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'base.context_processors.site_version',
             ],
         },
     },
@@ -194,10 +200,48 @@ STORAGES = {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        "BACKEND": "base.storage.OptimizedStaticFilesStorage"
     }
 }
 
+# Caches: 'default' is per process; 'shared' holds state every instance must agree
+# on (the content versions that key cached pages, fragments and facets). REDIS_URL
+# selects Redis, otherwise it is the database table made by `manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    } if os.getenv('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+CONTENT_VERSION_CACHE = 'shared'
+# How long a process reuses a version it read before checking the shared cache again
+CONTENT_VERSION_LOCAL_TTL = 5
+
+# Shared layout fragments are cached per release and site-content version
+RELEASE = os.getenv('VERCEL_GIT_COMMIT_SHA', '')[:12]
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# Server-Timing header with per-include render times (base/profiling.py)
+TEMPLATE_PROFILING = os.getenv('TEMPLATE_PROFILING', str(DEBUG)) == 'True'
+
+# Build-time asset optimisation (see base/storage.py)
+STATIC_OPTIMIZE_PREFIXES = ['base/']
+STATIC_WEBP_QUALITY = 80
+STATIC_AVIF_QUALITY = 50
+# Templates whose markup decides which rules are inlined as critical CSS
+CRITICAL_CSS_TEMPLATES = [
+    'base/layout/base.html',
+    'base/components/navbar.html',
+    'base/components/hero-section.html',
+    'base/components/toast.html',
+]
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -210,8 +254,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django JET Configuration
 JET_DEFAULT_THEME = 'default'
 JET_SIDE_MENU_COMPACT = True
-JET_CHANGE_FORM_SIBLING_LINKS = True
-JET_INDEX_DASHBOARD = 'jet.dashboard.dashboard.DefaultIndexDashboard'
+# Sibling links load every pk (and list-filter choices) of the model on each change form
+JET_CHANGE_FORM_SIBLING_LINKS = False
+JET_INDEX_DASHBOARD = 'base.dashboard.IndexDashboard'
 JET_APP_INDEX_DASHBOARD = 'jet.dashboard.dashboard.DefaultAppIndexDashboard'
 
 JET_THEMES = [
@@ -255,3 +300,113 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 EMAIL_TIMEOUT = 5
+
+# AI assistant retrieval index (see base/retrieval.py)
+RETRIEVAL_INDEX_PATH = os.getenv('RETRIEVAL_INDEX_PATH', str(BASE_DIR / 'var' / 'retrieval_index.npz'))
+RETRIEVAL_TOP_K = 3
+# Minimum share of the question's keywords a snippet must contain to be used
+RETRIEVAL_MIN_COVERAGE = 0.5
+
+# Sitemaps and feeds (see base/feeds.py); documents are prebuilt under PREBUILT_ROOT
+SITE_URL = os.getenv('SITE_URL', '')
+PREBUILT_ROOT = os.getenv('PREBUILT_ROOT', str(BASE_DIR / 'var' / 'prebuilt'))
+SITEMAP_PAGE_SIZE = 50000
+
+# Bulk event gallery import (see base/gallery.py)
+GALLERY_MAX_DIMENSION = 2048
+GALLERY_JPEG_QUALITY = 85
+GALLERY_MAX_FILE_BYTES = 25 * 1024 * 1024
+# Worker processes; 0 means one per CPU
+GALLERY_IMPORT_WORKERS = int(os.getenv('GALLERY_IMPORT_WORKERS', '0'))
+# Admin ZIP uploads are staged in default storage and imported off the request:
+# in a background thread, or by `import_event_gallery --staged` where threads
+# don't outlive the response (serverless)
+GALLERY_STAGING_DIR = 'gallery_imports'
+GALLERY_IMPORT_IN_BACKGROUND = os.getenv('GALLERY_IMPORT_IN_BACKGROUND', 'True') == 'True'
+
+# Public content pages served session-free and CDN-cacheable (see base/middleware.py)
+PUBLIC_PAGE_URL_NAMES = [
+    'home', 'services', 'case-study', 'case_studies_details',
+    'articles', 'articles_details', 'events', 'events_details',
+]
+PUBLIC_PAGE_MAX_AGE = 60
+PUBLIC_PAGE_S_MAXAGE = 300
+# Flash messages (contact form feedback) travel in a signed cookie instead of the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# AI assistant conversation memory (see base/memory.py); shared, since follow-ups may reach another instance
+ASSISTANT_MEMORY_CACHE = os.getenv('ASSISTANT_MEMORY_CACHE', 'shared')
+ASSISTANT_MEMORY_TTL = 60 * 30
+ASSISTANT_MEMORY_TURNS = 8
+ASSISTANT_MEMORY_MAX_BYTES = 4096
+
+# Near-duplicate / spam inquiry detection (see base/dedupe.py)
+INQUIRY_DUPLICATE_THRESHOLD = 0.8
+INQUIRY_DUPLICATE_MIN_WORDS = 8
+INQUIRY_DUPLICATE_AUTO_CLOSE = os.getenv('INQUIRY_DUPLICATE_AUTO_CLOSE', 'False') == 'True'
+
+# Surrogate-key tagging and CDN purge planning (see base/surrogate.py)
+SURROGATE_KEY_HEADERS = ['Surrogate-Key', 'Cache-Tag']
+SURROGATE_INDEX_TIMEOUT = 60 * 60 * 24 * 30
+SURROGATE_MAX_URLS_PER_KEY = 1000
+# A process re-records a key/URL pair at most this often (seconds)
+SURROGATE_RECORD_INTERVAL = 60 * 5
+# Query parameters kept in recorded URLs; everything else is stripped
+SURROGATE_URL_QUERY_PARAMS = []
+# Called with (keys, urls) after a content change; point it at a CDN purge client
+SURROGATE_PURGE_HANDLER = os.getenv('SURROGATE_PURGE_HANDLER', 'base.surrogate.log_purge')
+SURROGATE_PREWARM = os.getenv('SURROGATE_PREWARM', 'False') == 'True'
+SURROGATE_PREWARM_LIMIT = 50
+
+# Offline geocoding and nearby events (see base/geo.py)
+GEOCODER_GAZETTEER = BASE_DIR / 'base' / 'data' / 'gazetteer.csv'
+EVENTS_NEARBY_DEFAULT_RADIUS_KM = 50
+EVENTS_NEARBY_MAX_RADIUS_KM = 500
+
+# Recurring events: occurrences stored ahead of now per series (roll forward daily with
+# `manage.py materialize_event_occurrences`); later ones are expanded on demand
+EVENT_OCCURRENCES_AHEAD = int(os.getenv('EVENT_OCCURRENCES_AHEAD', '12'))
+
+# Related content (see base/related.py); rebuild with `manage.py build_related_content`
+RELATED_INDEX_PATH = os.getenv('RELATED_INDEX_PATH', str(BASE_DIR / 'var' / 'related_index.npz'))
+RELATED_TOP_K = 4
+RELATED_MIN_SCORE = 0.1
+RELATED_MAX_FEATURES = 4096
+
+# Admin foreign-key autocomplete (see base/admin.py)
+ADMIN_AUTOCOMPLETE_LIMIT = 20
+ADMIN_AUTOCOMPLETE_CACHE_TIMEOUT = 60
+
+# Closed inquiries older than the retention window are moved to monthly NDJSON.gz
+# files with `manage.py archive_inquiries` (see base/archive.py)
+INQUIRY_RETENTION_DAYS = int(os.getenv('INQUIRY_RETENTION_DAYS', '365'))
+INQUIRY_ARCHIVE_ROOT = os.getenv('INQUIRY_ARCHIVE_ROOT', str(BASE_DIR / 'var' / 'inquiry-archive'))
+
+# AI assistant generation backend (see base/llm.py). Empty keeps the rule-based replies;
+# 'base.llm.OpenAIChatBackend' talks to any OpenAI-compatible API, including the local
+# stub from `manage.py llm_stub_server` (LLM_API_BASE=http://127.0.0.1:8765/v1)
+LLM_BACKEND = os.getenv('LLM_BACKEND', '')
+LLM_API_BASE = os.getenv('LLM_API_BASE', 'https://api.openai.com/v1')
+LLM_API_KEY = os.getenv('LLM_API_KEY', '')
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o-mini')
+LLM_MAX_TOKENS = 400
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '8'))
+LLM_QUEUE_TIMEOUT = 2
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_BREAKER_FAILURES = 3
+LLM_BREAKER_RESET = 30
+
+# Live admin inquiry events over server-sent events (see base/live.py); fed by
+# Postgres LISTEN/NOTIFY, or in-process only on other databases
+# On only when served by ASGI (config/asgi.py sets it): under WSGI the stream answers 204
+# and nothing is published. Set it for other processes that write inquiries to an ASGI-served admin
+LIVE_EVENTS_ENABLED = os.getenv('LIVE_EVENTS_ENABLED', 'False') == 'True'
+LIVE_EVENTS_CHANNEL = 'inquiry_events'
+LIVE_EVENTS_HEARTBEAT = 15
+LIVE_EVENTS_RETRY_MS = 5000
+LIVE_EVENTS_QUEUE_SIZE = 100
+# Inquiry ids listed in one bulk event (NOTIFY payloads are capped at 8000 bytes)
+LIVE_EVENTS_MAX_IDS = 200
+
+# Service catalog facet counts (see base/catalog.py), also expired by Service changes
+CATALOG_FACETS_TIMEOUT = 60 * 60